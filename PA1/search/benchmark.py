@@ -0,0 +1,196 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Runs every combination of search function, search problem and layout without
+graphics, and reports the wall time, nodes expanded, path cost and memory of
+each run as CSV and/or JSON.
+
+A JSON report can be passed back in with --baseline; each run is then compared
+with the same run of the baseline and the regressions are listed.
+
+  > python benchmark.py --json baseline.json
+  > python benchmark.py --baseline baseline.json --csv report.csv
+"""
+
+import csv
+import functools
+import json
+import optparse
+import os
+import sys
+import time
+import tracemalloc
+
+import layout
+import pacman
+import search
+import searchAgents
+import util
+
+ALGORITHMS = ['dfs', 'bfs', 'ucs', 'astar']
+PROBLEMS = ['PositionSearchProblem', 'CornersProblem', 'FoodSearchProblem', 'AnyFoodSearchProblem']
+
+# the heuristic astar uses for each problem
+HEURISTICS = {
+    'PositionSearchProblem': searchAgents.manhattanHeuristic,
+    'CornersProblem': searchAgents.cornersHeuristic,
+    'FoodSearchProblem': searchAgents.foodHeuristic,
+    'AnyFoodSearchProblem': search.nullHeuristic,
+}
+
+FIELDS = ['algorithm', 'problem', 'layout', 'status', 'cost', 'time', 'expanded', 'generated', 'peakMemory']
+
+def readCommand(argv):
+    parser = optparse.OptionParser(description = 'Benchmark the search functions on the bundled layouts')
+    parser.add_option('-a', '--algorithms', dest = 'algorithms', default = ','.join(ALGORITHMS),
+                      help = 'Comma separated search functions from search.py [Default: %default]')
+    parser.add_option('-p', '--problems', dest = 'problems', default = ','.join(PROBLEMS),
+                      help = 'Comma separated search problems from searchAgents.py [Default: %default]')
+    parser.add_option('-l', '--layouts', dest = 'layouts', default = None,
+                      help = 'Comma separated layouts [Default: every layout in layouts/]')
+    parser.add_option('-t', '--timeout', dest = 'timeout', type = 'int', default = 10,
+                      help = 'Seconds allowed for each run [Default: %default]')
+    parser.add_option('--csv', dest = 'csv', default = None,
+                      help = 'Write the report to this CSV file')
+    parser.add_option('--json', dest = 'json', default = None,
+                      help = 'Write the report to this JSON file, which can be used as a baseline')
+    parser.add_option('--baseline', dest = 'baseline', default = None,
+                      help = 'A JSON report to compare the runs with')
+    parser.add_option('--tolerance', dest = 'tolerance', type = 'float', default = 0.25,
+                      help = 'Fraction by which a run may be slower than the baseline [Default: %default]')
+    parser.add_option('--noMemory', dest = 'noMemory', action = 'store_true', default = False,
+                      help = 'Do not trace memory, which makes the runs faster')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+def allLayouts():
+    return sorted(name[:-4] for name in os.listdir('layouts') if name.endswith('.lay'))
+
+def makeProblem(problemName, gameState):
+    "Builds the search problem, without its warnings and without drawing anything."
+    util.mutePrint()
+    try:
+        if problemName == 'PositionSearchProblem':
+            return searchAgents.PositionSearchProblem(gameState, warn=False, visualize=False)
+        return getattr(searchAgents, problemName)(gameState)
+    finally:
+        util.unmutePrint()
+
+def runOne(algorithm, problemName, layoutName, timeout):
+    """
+    Runs one search and returns its row of the report. The status is 'ok',
+    'nopath', 'timeout' or 'error'. The tables shared between problems on a
+    layout are cleared first, so a run's time does not depend on which runs
+    came before it.
+    """
+    searchAgents.clearLayoutCaches()
+    gameState = pacman.GameState()
+    gameState.initialize(layout.getLayout(layoutName), 0)
+    problem = makeProblem(problemName, gameState)
+    function = getattr(search, algorithm)
+    if 'heuristic' in function.__code__.co_varnames:
+        function = functools.partial(function, heuristic=HEURISTICS[problemName])
+    function = util.TimeoutFunction(function, timeout)
+
+    row = {'algorithm': algorithm, 'problem': problemName, 'layout': layoutName,
+           'cost': None, 'expanded': None, 'generated': None, 'peakMemory': None}
+    start = time.perf_counter()
+    try:
+        path = function(problem)
+        row['status'] = 'nopath' if path is None else 'ok'
+        if path is not None:
+            row['cost'] = problem.getCostOfActions(path)
+    except util.TimeoutFunctionException:
+        row['status'] = 'timeout'
+    except Exception as e:
+        # e.g. a corner or a dot that cannot be reached from the start
+        row['status'] = 'error'
+        print('%s %s %s raised %s: %s' % (algorithm, problemName, layoutName, type(e).__name__, e))
+    row['time'] = time.perf_counter() - start
+
+    stats = getattr(problem, 'searchStats', None)
+    if stats is not None and row['status'] in ('ok', 'nopath'):
+        row['expanded'] = stats.expanded
+        row['generated'] = stats.generated
+        row['peakMemory'] = stats.peakMemory
+    return row
+
+def compare(rows, baselineRows, tolerance):
+    """
+    Returns a line for each run that got worse than the same run of the
+    baseline: it fails now, costs more, expands more nodes or is slower by
+    more than the tolerance.
+    """
+    baseline = dict(((row['algorithm'], row['problem'], row['layout']), row) for row in baselineRows)
+    regressions = []
+    for row in rows:
+        key = (row['algorithm'], row['problem'], row['layout'])
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        name = '%s %s %s' % key
+        if row['status'] != old['status']:
+            if old['status'] == 'ok':
+                regressions.append('%s: %s, was ok' % (name, row['status']))
+            continue
+        if row['status'] != 'ok':
+            continue
+        if row['cost'] > old['cost']:
+            regressions.append('%s: cost %s, was %s' % (name, row['cost'], old['cost']))
+        if row['expanded'] is not None and old['expanded'] is not None and row['expanded'] > old['expanded']:
+            regressions.append('%s: expanded %d, was %d' % (name, row['expanded'], old['expanded']))
+        if row['time'] > old['time'] * (1 + tolerance) and row['time'] - old['time'] > 0.01:
+            regressions.append('%s: %.3fs, was %.3fs' % (name, row['time'], old['time']))
+    return regressions
+
+def runBenchmark(options):
+    algorithms = options.algorithms.split(',')
+    problems = options.problems.split(',')
+    layouts = options.layouts.split(',') if options.layouts else allLayouts()
+    if not options.noMemory:
+        tracemalloc.start()
+
+    rows = []
+    for layoutName in layouts:
+        for problemName in problems:
+            for algorithm in algorithms:
+                row = runOne(algorithm, problemName, layoutName, options.timeout)
+                rows.append(row)
+                print('%-10s %-22s %-18s %-8s cost=%-6s expanded=%-8s %.3fs' % (
+                    algorithm, problemName, layoutName, row['status'], row['cost'], row['expanded'], row['time']))
+
+    if options.csv:
+        with open(options.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compare(rows, json.load(f), options.tolerance)
+        print('%d regressions against %s' % (len(regressions), options.baseline))
+        for line in regressions:
+            print('  ' + line)
+        return len(regressions) == 0
+    return True
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    sys.exit(0 if runBenchmark(options) else 1)
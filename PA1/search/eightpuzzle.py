@@ -14,9 +14,56 @@
 
 import search
 import random
+import collections
+import concurrent.futures
+import optparse
+import sys
+import time
 
 # Module Classes
 
+class PuzzleTables:
+    """
+    Tables shared by every puzzle of one size: for each blank position the
+    moves that can be made and where they take the blank, the goal board, and
+    the Manhattan distance of each tile from each position to its goal.
+
+    Boards are packed 'bits' bits per cell: 4 up to the 15-puzzle, more for
+    bigger boards.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.numCells = size * size
+        self.bits = max(4, (self.numCells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.moves = []
+        for position in range(self.numCells):
+            row, col = divmod(position, size)
+            moves = []
+            if row != 0:
+                moves.append(('up', position - size))
+            if row != size - 1:
+                moves.append(('down', position + size))
+            if col != 0:
+                moves.append(('left', position - 1))
+            if col != size - 1:
+                moves.append(('right', position + 1))
+            self.moves.append(moves)
+        self.moveTargets = [dict(moves) for moves in self.moves]
+        self.goal = 0
+        for position in range(self.numCells):
+            self.goal |= position << (self.bits * position)
+        # manhattan[tile][position]: moves from position to the tile's goal
+        self.manhattan = [[abs(p // size - t // size) + abs(p % size - t % size) for p in range(self.numCells)]
+                          for t in range(self.numCells)]
+
+PUZZLE_TABLES = {}
+
+def getPuzzleTables(size):
+    if size not in PUZZLE_TABLES:
+        PUZZLE_TABLES[size] = PuzzleTables(size)
+    return PUZZLE_TABLES[size]
+
 class EightPuzzleState:
     """
     The Eight Puzzle is described in the course textbook on
@@ -25,7 +72,11 @@ class EightPuzzleState:
     This class defines the mechanics of the puzzle itself.  The
     task of recasting this puzzle as a search problem is left to
     the EightPuzzleSearchProblem class.
+
+    The same class also handles the 15-puzzle and larger NxN boards:
+    the size of the board is taken from the number of tiles.
     """
+    __slots__ = ('size', 'board', 'blank', 'tables')
 
     def __init__( self, numbers ):
         """
@@ -46,18 +97,54 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        A list of 16 numbers from 0 to 15 makes a 15-puzzle, and so on
+        for any square number of tiles.
+
+        The configuration of the puzzle is packed into the int 'board',
+        with the tile at position row * size + col in the bits from
+        tables.bits * position up, and the position of the blank in 'blank'.
+        The read-only 'cells' and 'blankLocation' decode it as a list of rows
+        and a (row, col) pair.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        self.size = int(round(len(numbers) ** 0.5))
+        if self.size < 2 or self.size * self.size != len(numbers) or sorted(numbers) != list(range(len(numbers))):
+            raise ValueError('Not the tiles of a square puzzle: %s' % str(numbers))
+        self.tables = getPuzzleTables(self.size)
+        bits = self.tables.bits
+        self.board = 0
+        for position, tile in enumerate(numbers):
+            self.board |= tile << (bits * position)
+            if tile == 0:
+                self.blank = position
+
+    def fromBoard(tables, board, blank):
+        "Makes a puzzle straight from its packed board, without unpacking it."
+        puzzle = EightPuzzleState.__new__(EightPuzzleState)
+        puzzle.size = tables.size
+        puzzle.tables = tables
+        puzzle.board = board
+        puzzle.blank = blank
+        return puzzle
+    fromBoard = staticmethod(fromBoard)
+
+    def getTile(self, position):
+        "Returns the tile at position row * size + col (0 for the blank)."
+        return (self.board >> (self.tables.bits * position)) & self.tables.mask
+
+    def getNumbers(self):
+        "Returns the tiles as a list, row by row, as passed to the constructor."
+        return [self.getTile(position) for position in range(self.size * self.size)]
+
+    def getCells(self):
+        "Returns the tiles as a list of rows."
+        numbers = self.getNumbers()
+        return [numbers[row * self.size:(row + 1) * self.size] for row in range(self.size)]
+
+    def getBlankLocation(self):
+        return divmod(self.blank, self.size)
+
+    cells = property(getCells)
+    blankLocation = property(getBlankLocation)
 
     def isGoal( self ):
         """
@@ -77,13 +164,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.board == self.tables.goal
 
     def legalMoves( self ):
         """
@@ -95,17 +176,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if(row != 0):
-            moves.append('up')
-        if(row != 2):
-            moves.append('down')
-        if(col != 0):
-            moves.append('left')
-        if(col != 2):
-            moves.append('right')
-        return moves
+        return [move for move, target in self.tables.moves[self.blank]]
 
     def result(self, move):
         """
@@ -113,37 +184,22 @@ class EightPuzzleState:
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legalMoves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves will raise an exception.
 
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
-        else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
-        return newPuzzle
+        target = self.tables.moveTargets[self.blank].get(move)
+        if target is None:
+            raise Exception('Illegal move: ' + str(move))
+        return self.resultTo(target)
+
+    def resultTo(self, target):
+        "Returns the puzzle after the tile at position target slides into the blank."
+        bits = self.tables.bits
+        tile = (self.board >> (bits * target)) & self.tables.mask
+        board = self.board ^ (tile << (bits * target)) ^ (tile << (bits * self.blank))
+        return EightPuzzleState.fromBoard(self.tables, board, target)
 
     # Utilities for comparison and display
     def __eq__(self, other):
@@ -155,27 +211,26 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.board == other.board and self.size == other.size
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.board)
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
+        # each cell is a space, the tile, a space and a bar
+        width = 4 if self.size < 4 else 5
         lines = []
-        horizontalLine = ('-' * (13))
+        horizontalLine = ('-' * (width * self.size + 1))
         lines.append(horizontalLine)
-        for row in self.cells:
+        for row in self.getCells():
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + str(col).rjust(width - 3) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -196,7 +251,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -207,10 +262,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
-        succ = []
-        for a in state.legalMoves():
-            succ.append((state.result(a), a, 1))
-        return succ
+        return [(state.resultTo(target), move, 1) for move, target in state.tables.moves[state.blank]]
 
     def getCostOfActions(self, actions):
         """
@@ -221,6 +273,140 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+class NPuzzleSearchProblem(EightPuzzleSearchProblem):
+    """
+      The same search problem on an NxN board. The puzzle may be an
+      EightPuzzleState of any size or just the list of its tiles.
+    """
+    def __init__(self, puzzle):
+        if not isinstance(puzzle, EightPuzzleState):
+            puzzle = EightPuzzleState(list(puzzle))
+        EightPuzzleSearchProblem.__init__(self, puzzle)
+
+# Heuristics for the puzzle, to be used with search.aStarSearch or
+# search.iterativeDeepeningAStarSearch
+
+def manhattanPuzzleHeuristic(state, problem=None):
+    "The sum of the Manhattan distances of the tiles from their goal positions."
+    tables = state.tables
+    manhattan, bits, mask = tables.manhattan, tables.bits, tables.mask
+    board = state.board
+    total = 0
+    for position in range(tables.numCells):
+        tile = board & mask
+        if tile:
+            total += manhattan[tile][position]
+        board >>= bits
+    return total
+
+def _lineConflicts(goalOrder):
+    """
+    goalOrder lists the goal positions, along a line, of the tiles that are in
+    their goal line. Returns how many of them must leave the line so that the
+    rest can pass each other: the ones not in a longest increasing run.
+    """
+    longest = []
+    for i in range(len(goalOrder)):
+        longest.append(1 + max([longest[j] for j in range(i) if goalOrder[j] < goalOrder[i]] or [0]))
+    return len(goalOrder) - max(longest or [0])
+
+def linearConflictHeuristic(state, problem=None):
+    """
+    The Manhattan distance, plus two moves for each tile that has to step out
+    of its goal row or column to let another tile of that line get past it.
+    """
+    size = state.size
+    cells = state.getCells()
+    total = manhattanPuzzleHeuristic(state)
+    for line in range(size):
+        # tiles in their goal row, by goal column; then in their goal column, by goal row
+        inRow = [tile % size for tile in cells[line] if tile and tile // size == line]
+        inColumn = [tile // size for tile in [cells[row][line] for row in range(size)] if tile and tile % size == line]
+        total += 2 * (_lineConflicts(inRow) + _lineConflicts(inColumn))
+    return total
+
+class PatternDatabase:
+    """
+    An additive pattern database for one group of tiles. For every placement
+    of those tiles it holds the fewest moves of those tiles that bring them to
+    their goal positions, whatever the other tiles do. Moves of the other
+    tiles are free, so the costs from disjoint groups can be added up and the
+    sum is still admissible.
+
+    A placement is indexed by the sum of position(tile i) * numCells ** i. The
+    table is filled in by a 0-1 BFS back from the goal over placements and
+    blank positions.
+    """
+    UNKNOWN = 255
+
+    def __init__(self, size, pattern):
+        tables = getPuzzleTables(size)
+        self.pattern = tuple(pattern)
+        numCells = tables.numCells
+        self.powers = [numCells ** i for i in range(len(self.pattern))]
+        numPlacements = numCells ** len(self.pattern)
+        self.costs = bytearray([self.UNKNOWN]) * numPlacements
+
+        # a BFS state is placement * numCells + blank
+        costs = bytearray([self.UNKNOWN]) * (numPlacements * numCells)
+        goal = sum(tile * power for tile, power in zip(self.pattern, self.powers))
+        costs[goal * numCells] = 0
+        queue = collections.deque([goal * numCells])
+        while queue:
+            code = queue.popleft()
+            placement, blank = divmod(code, numCells)
+            cost = costs[code]
+            if cost < self.costs[placement]:
+                self.costs[placement] = cost
+            positions = [(placement // power) % numCells for power in self.powers]
+            for move, target in tables.moves[blank]:
+                if target in positions:
+                    # one of the group's tiles slides into the blank
+                    i = positions.index(target)
+                    nextCode = (placement + (blank - target) * self.powers[i]) * numCells + target
+                    if costs[nextCode] > cost + 1:
+                        costs[nextCode] = cost + 1
+                        queue.append(nextCode)
+                else:
+                    nextCode = placement * numCells + target
+                    if costs[nextCode] > cost:
+                        costs[nextCode] = cost
+                        queue.appendleft(nextCode)
+
+    def getCost(self, positions):
+        "positions[tile] is the position of each tile on the board."
+        return self.costs[sum(positions[tile] * power for tile, power in zip(self.pattern, self.powers))]
+
+# the tile groups of the pattern databases for each board size
+PATTERN_GROUPS = {
+    3: [(1, 2, 3, 4), (5, 6, 7, 8)],
+    4: [(1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15)],
+}
+
+PATTERN_DATABASES = {}
+
+def getPatternDatabases(size):
+    "Returns the pattern databases for a board size, building them the first time."
+    if size not in PATTERN_DATABASES:
+        PATTERN_DATABASES[size] = [PatternDatabase(size, group) for group in PATTERN_GROUPS[size]]
+    return PATTERN_DATABASES[size]
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+    The sum of the costs of the disjoint pattern databases for the board size.
+    Boards without pattern groups use linearConflictHeuristic instead.
+    """
+    if state.size not in PATTERN_GROUPS:
+        return linearConflictHeuristic(state, problem)
+    tables = state.tables
+    bits, mask = tables.bits, tables.mask
+    positions = [0] * tables.numCells
+    board = state.board
+    for position in range(tables.numCells):
+        positions[board & mask] = position
+        board >>= bits
+    return sum(database.getCost(positions) for database in getPatternDatabases(state.size))
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -248,28 +434,151 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size: 3 for the eight puzzle, 4 for the 15-puzzle, N for NxN
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+HEURISTICS = {
+    'manhattan': manhattanPuzzleHeuristic,
+    'linearConflict': linearConflictHeuristic,
+    'patternDatabase': patternDatabaseHeuristic,
+}
+
+def solvePuzzle(numbers, algorithm='astar', heuristic='patternDatabase'):
+    """
+      Solves the puzzle with the given tiles using a search function and a
+    heuristic from HEURISTICS, both given by name. Returns (number of moves,
+    nodes expanded, seconds taken).
+    """
+    problem = NPuzzleSearchProblem(numbers)
+    start = time.perf_counter()
+    path = getattr(search, algorithm)(problem, HEURISTICS[heuristic])
+    return len(path), problem.searchStats.expanded, time.perf_counter() - start
+
+def prepareHeuristic(heuristic, sizes):
+    """
+      Builds the tables the heuristic named 'heuristic' needs for each board
+    size up front, so that no puzzle's solve time pays for them.
+    """
+    if heuristic == 'patternDatabase':
+        for size in sizes:
+            if size in PATTERN_GROUPS:
+                getPatternDatabases(size)
+
+def getPuzzleSizes(puzzles):
+    return sorted(set(int(round(len(numbers) ** 0.5)) for numbers in puzzles))
+
+def solvePuzzles(puzzles, algorithm='astar', heuristic='patternDatabase', processes=None):
+    """
+      Solves a batch of puzzles, each a list of tiles, in a pool of
+    'processes' worker processes (by default one per core). Returns the
+    results of solvePuzzle in the same order as the puzzles.
+
+    The heuristic's tables are built before the pool starts, so forked
+    workers inherit them; workers started another way build them once as
+    they start.
+    """
+    sizes = getPuzzleSizes(puzzles)
+    prepareHeuristic(heuristic, sizes)
+    if processes == 1:
+        return [solvePuzzle(numbers, algorithm, heuristic) for numbers in puzzles]
+    with concurrent.futures.ProcessPoolExecutor(processes, initializer=prepareHeuristic,
+                                                initargs=(heuristic, sizes)) as pool:
+        return list(pool.map(solvePuzzle, puzzles, [algorithm] * len(puzzles), [heuristic] * len(puzzles)))
+
+def readPuzzles(filename):
+    """
+      Reads puzzles from a file with the tiles of one puzzle per line,
+    separated by spaces or commas. Blank lines and lines starting with #
+    are skipped.
+    """
+    puzzles = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                puzzles.append([int(tile) for tile in line.replace(',', ' ').split()])
+    return puzzles
+
+def randomPuzzles(seeds, moves, size):
+    "Returns the tiles of createRandomEightPuzzle(moves, size) for each random seed."
+    puzzles = []
+    for seed in seeds:
+        random.seed(seed)
+        puzzles.append(createRandomEightPuzzle(moves, size).getNumbers())
+    return puzzles
+
+def readCommand(argv):
+    parser = optparse.OptionParser(description = 'Solve sliding tile puzzles')
+    parser.add_option('-s', '--size', dest = 'size', type = 'int', default = 3,
+                      help = 'The board is size x size: 3 for the eight puzzle, 4 for the 15-puzzle [Default: %default]')
+    parser.add_option('-f', '--file', dest = 'file', default = None,
+                      help = 'Solve every puzzle in this file, one list of tiles per line')
+    parser.add_option('--seeds', dest = 'seeds', default = None,
+                      help = 'Solve a random puzzle for each seed, e.g. 1-50 or 3,7,9')
+    parser.add_option('-m', '--moves', dest = 'moves', type = 'int', default = 100,
+                      help = 'Random moves made to shuffle each seeded puzzle [Default: %default]')
+    parser.add_option('-a', '--algorithm', dest = 'algorithm', default = 'astar',
+                      help = 'The search function: astar or idastar [Default: %default]')
+    parser.add_option('--heuristic', dest = 'heuristic', default = 'patternDatabase',
+                      help = 'One of %s [Default: %%default]' % ', '.join(sorted(HEURISTICS)))
+    parser.add_option('-j', '--processes', dest = 'processes', type = 'int', default = None,
+                      help = 'Worker processes for a batch [Default: one per core]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+def runBatch(options):
+    "Solves a batch of puzzles and reports the throughput."
+    if options.file:
+        puzzles = readPuzzles(options.file)
+    else:
+        seeds = []
+        for part in options.seeds.split(','):
+            first, _, last = part.partition('-')
+            seeds += list(range(int(first), int(last or first) + 1))
+        puzzles = randomPuzzles(seeds, options.moves, options.size)
+
+    # the throughput is for solving, not for building the heuristic's tables
+    prepareHeuristic(options.heuristic, getPuzzleSizes(puzzles))
+    start = time.perf_counter()
+    results = solvePuzzles(puzzles, options.algorithm, options.heuristic, options.processes)
+    elapsed = time.perf_counter() - start
+    for i, (moves, expanded, seconds) in enumerate(results):
+        print('puzzle %d: %d moves, %d nodes expanded, %.3fs' % (i + 1, moves, expanded, seconds))
+    print('Solved %d puzzles in %.2f seconds: %.1f puzzles/sec, %.0f nodes expanded per puzzle' % (
+        len(results), elapsed, len(results) / elapsed, sum(r[1] for r in results) / float(len(results))))
+
 if __name__ == '__main__':
-    puzzle = createRandomEightPuzzle(25)
+    options = readCommand(sys.argv[1:])
+    if options.file or options.seeds:
+        runBatch(options)
+        sys.exit(0)
+
+    size = options.size
+    puzzle = createRandomEightPuzzle(25 if size == 3 else options.moves, size)
     print('A random puzzle:')
     print(puzzle)
 
-    problem = EightPuzzleSearchProblem(puzzle)
-    path = search.breadthFirstSearch(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    problem = NPuzzleSearchProblem(puzzle)
+    if size == 3:
+        path = search.breadthFirstSearch(problem)
+        print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    else:
+        path = getattr(search, options.algorithm)(problem, HEURISTICS[options.heuristic])
+        print('%s found a path of %d moves: %s' % (options.algorithm, len(path), str(path)))
     curr = puzzle
     i = 1
     for a in path:
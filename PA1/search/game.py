@@ -22,6 +22,7 @@
 
 from util import *
 import time, os
+import random
 import traceback
 import sys
 
@@ -190,6 +191,7 @@ class Grid:
 
     def __eq__(self, other):
         if other == None: return False
+        if isinstance(other, BitGrid): return other == self
         return self.data == other.data
 
     def __hash__(self):
@@ -216,6 +218,17 @@ class Grid:
         g.data = self.data
         return g
 
+    def copyColumn(self, x):
+        """
+        Returns a copy that shares every column with this grid except
+        column x, which can then be changed on its own.
+        """
+        g = Grid(0, 0)
+        g.width, g.height = self.width, self.height
+        g.data = self.data[:]
+        g.data[x] = self.data[x][:]
+        return g
+
     def count(self, item =True ):
         return sum([x.count(item) for x in self.data])
 
@@ -274,6 +287,130 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid(Grid):
+    """
+    A Grid of booleans backed by a single Python int, bit x * height + y being
+    cell (x,y). It has the same grid[x][y] read/write interface as Grid, but
+    copying, hashing, comparing and counting work on the int as a whole, and
+    a copy costs no more than a reference to it.
+    """
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def fromGrid(grid):
+        "Returns a BitGrid with the same contents as any Grid."
+        if isinstance(grid, BitGrid):
+            return grid.copy()
+        g = BitGrid(grid.width, grid.height)
+        bits = 0
+        for x, column in enumerate(grid.data):
+            for y, cell in enumerate(column):
+                if cell:
+                    bits |= 1 << (x * grid.height + y)
+        g.bits = bits
+        return g
+    fromGrid = staticmethod(fromGrid)
+
+    def toGrid(self):
+        "Returns a list of lists backed Grid with the same contents."
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+    def __getitem__(self, i):
+        return _BitGridColumn(self, i)
+
+    def __setitem__(self, key, item):
+        column = _BitGridColumn(self, key)
+        for y in range(self.height):
+            column[y] = item[y]
+
+    def __str__(self):
+        out = [[str(self.isSet(x, y))[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None: return False
+        if not isinstance(other, BitGrid):
+            other = BitGrid.fromGrid(other)
+        return self.bits == other.bits and self.height == other.height
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def isSet(self, x, y):
+        "Returns grid[x][y] without building a column."
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        # the int is immutable, so a copy shares it just like a shallow copy
+        return self.copy()
+
+    def copyColumn(self, x):
+        return self.copy()
+
+    def count(self, item =True ):
+        n = bin(self.bits).count('1')
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key = True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        list = []
+        height = self.height
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append( (index // height, index % height) )
+            bits ^= low
+        return list
+
+class _BitGridColumn:
+    "The column x of a BitGrid, so that grid[x][y] reads and writes the grid."
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        grid = self.grid
+        if y < 0: y += grid.height
+        if not 0 <= y < grid.height: raise IndexError('BitGrid index out of range')
+        return (grid.bits >> (self.x * grid.height + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        grid = self.grid
+        if y < 0: y += grid.height
+        if not 0 <= y < grid.height: raise IndexError('BitGrid index out of range')
+        mask = 1 << (self.x * grid.height + y)
+        if value:
+            grid.bits |= mask
+        else:
+            grid.bits &= ~mask
+
+    def __len__(self):
+        return self.grid.height
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
@@ -368,6 +505,24 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
+ZOBRIST_KEYS = {}
+
+def getZobristKeys(width, height):
+    """
+    Returns a table of random 64 bit keys for the food and one for the
+    capsules of a width by height layout, with the key of (x, y) at
+    x * height + y. The food hash of a state is the xor of the keys of its
+    dots, so eating a dot updates it with a single xor.
+    """
+    if (width, height) not in ZOBRIST_KEYS:
+        # a generator of its own, so the keys are the same in every run and
+        # the games' random choices are not disturbed
+        generator = random.Random(0)
+        foodKeys = [generator.getrandbits(64) for i in range(width * height)]
+        capsuleKeys = [generator.getrandbits(64) for i in range(width * height)]
+        ZOBRIST_KEYS[(width, height)] = (foodKeys, capsuleKeys)
+    return ZOBRIST_KEYS[(width, height)]
+
 class GameStateData:
     """
 
@@ -377,9 +532,13 @@ class GameStateData:
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates( prevState.agentStates )
+            # The food, the capsules and the agent states are shared with the
+            # predecessor; the rules copy each one before changing it
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
+            self._foodHash = prevState._foodHash
+            self._capsuleHash = prevState._capsuleHash
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
@@ -395,6 +554,8 @@ class GameStateData:
     def deepCopy( self ):
         state = GameStateData( self )
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates( self.agentStates )
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -408,6 +569,29 @@ class GameStateData:
             copiedStates.append( agentState.copy() )
         return copiedStates
 
+    def copyAgentState( self, index ):
+        """
+        Replaces the agent state at index with a copy of its own, which can
+        be changed without changing the states that shared it.
+        """
+        agentState = self.agentStates[index].copy()
+        self.agentStates[index] = agentState
+        return agentState
+
+    def removeFood( self, x, y ):
+        "Eats the dot at (x, y), updating the food hash."
+        self.food = self.food.copyColumn(x)
+        self.food[x][y] = False
+        foodKeys, capsuleKeys = getZobristKeys(self.food.width, self.food.height)
+        self._foodHash ^= foodKeys[x * self.food.height + y]
+
+    def removeCapsule( self, position ):
+        "Eats the capsule at position, updating the capsule hash."
+        self.capsules = [c for c in self.capsules if c != position]
+        x, y = position
+        foodKeys, capsuleKeys = getZobristKeys(self.food.width, self.food.height)
+        self._capsuleHash ^= capsuleKeys[x * self.food.height + y]
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
@@ -415,6 +599,8 @@ class GameStateData:
         if other == None: return False
         # TODO Check for type of other
         if not self.agentStates == other.agentStates: return False
+        if self._foodHash != other._foodHash or self._capsuleHash != other._capsuleHash:
+            return False
         if not self.food == other.food: return False
         if not self.capsules == other.capsules: return False
         if not self.score == other.score: return False
@@ -422,15 +608,11 @@ class GameStateData:
 
     def __hash__( self ):
         """
-        Allows states to be keys of dictionaries.
+        Allows states to be keys of dictionaries. The food and the capsules
+        are hashed by the keys kept up to date as they are eaten, so only the
+        few agent states are hashed here.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        return hash((self._foodHash, self._capsuleHash, tuple(self.agentStates), self.score))
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
@@ -491,6 +673,13 @@ class GameStateData:
         self.food = layout.food.copy()
         #self.capsules = []
         self.capsules = layout.capsules[:]
+        foodKeys, capsuleKeys = getZobristKeys(layout.width, layout.height)
+        self._foodHash = 0
+        for x, y in self.food.asList():
+            self._foodHash ^= foodKeys[x * layout.height + y]
+        self._capsuleHash = 0
+        for x, y in self.capsules:
+            self._capsuleHash ^= capsuleKeys[x * layout.height + y]
         self.layout = layout
         self.score = 0
         self.scoreChange = 0
@@ -14,8 +14,11 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import Actions
+import heapq
 import os
 import random
+import weakref
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
@@ -36,6 +39,7 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.corridorGraph = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
@@ -62,6 +66,15 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def getCorridorGraph(self):
+        """
+        Returns the CorridorGraph of the walls, building it the first time it is
+        asked for. Layouts with the same walls share one graph.
+        """
+        if self.corridorGraph is None:
+            self.corridorGraph = getCorridorGraph(self.walls)
+        return self.corridorGraph
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -129,6 +142,288 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
+
+class CorridorGraph:
+    """
+    The skeleton of a maze. Its nodes are the junctions and dead ends of the
+    walls, and its edges are the corridors between them, each with the cells
+    inside it. Every other open cell lies inside exactly one corridor, so
+    distances and paths between any two cells are found by running Dijkstra's
+    algorithm over the nodes only. The distances from each node are kept once
+    computed.
+    """
+    def __init__(self, walls):
+        self.walls = walls
+        self.nodes = []
+        self.nodeIndex = {}
+        self.edges = []
+        self.adjacency = []
+        self.cellEdge = {}
+        self.nodeDistances = {}
+
+        openCells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        for cell in openCells:
+            if len(self._neighbors(cell)) != 2:
+                self._addNode(cell)
+        for node in range(len(self.nodes)):
+            self._addCorridors(node)
+        # a loop of corridor cells with no junction gets a node of its own
+        for cell in openCells:
+            if cell not in self.nodeIndex and cell not in self.cellEdge:
+                self._addCorridors(self._addNode(cell))
+
+    def _neighbors(self, cell):
+        x, y = cell
+        return [n for n in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)] if not self.walls[n[0]][n[1]]]
+
+    def _addNode(self, cell):
+        self.nodeIndex[cell] = len(self.nodes)
+        self.nodes.append(cell)
+        self.adjacency.append([])
+        return self.nodeIndex[cell]
+
+    def _addCorridors(self, node):
+        "Follows every corridor out of node that has not been recorded yet."
+        start = self.nodes[node]
+        for first in self._neighbors(start):
+            if first in self.cellEdge:
+                continue
+            interior, previous, current = [], start, first
+            while current not in self.nodeIndex:
+                interior.append(current)
+                previous, current = current, [n for n in self._neighbors(current) if n != previous][0]
+            end = self.nodeIndex[current]
+            # a corridor with no cells inside is seen from both ends; keep it once
+            if not interior and end < node:
+                continue
+            edge = len(self.edges)
+            self.edges.append((node, end, tuple(interior)))
+            for offset, cell in enumerate(interior):
+                self.cellEdge[cell] = (edge, offset)
+            self.adjacency[node].append((edge, end, len(interior) + 1))
+            if end != node:
+                self.adjacency[end].append((edge, node, len(interior) + 1))
+
+    def getNumNodes(self):
+        return len(self.nodes)
+
+    def _entries(self, cell):
+        "Returns the nodes nearest to cell as (node, distance) pairs."
+        if cell in self.nodeIndex:
+            return [(self.nodeIndex[cell], 0)]
+        edge, offset = self.cellEdge[cell]
+        start, end, interior = self.edges[edge]
+        return [(start, offset + 1), (end, len(interior) - offset)]
+
+    def _distancesFrom(self, source):
+        "Returns the distances and the edge used to reach each node from source."
+        if source not in self.nodeDistances:
+            distances = [None] * len(self.nodes)
+            previous = [None] * len(self.nodes)
+            distances[source] = 0
+            heap = [(0, source)]
+            while heap:
+                distance, node = heapq.heappop(heap)
+                if distance > distances[node]:
+                    continue
+                for edge, other, length in self.adjacency[node]:
+                    if distances[other] is None or distance + length < distances[other]:
+                        distances[other] = distance + length
+                        previous[other] = (edge, node)
+                        heapq.heappush(heap, (distance + length, other))
+            self.nodeDistances[source] = (distances, previous)
+        return self.nodeDistances[source]
+
+    def _bestRoute(self, pos1, pos2):
+        """
+        Returns (distance, start node, end node) of the shortest route between
+        two cells, with no nodes when they are on the same corridor and the
+        direct way is shortest, or None if there is no route.
+        """
+        best = None
+        if pos1 not in self.nodeIndex and pos2 not in self.nodeIndex:
+            edge1, offset1 = self.cellEdge[pos1]
+            edge2, offset2 = self.cellEdge[pos2]
+            if edge1 == edge2:
+                best = (abs(offset1 - offset2), None, None)
+        for node1, distance1 in self._entries(pos1):
+            distances = self._distancesFrom(node1)[0]
+            for node2, distance2 in self._entries(pos2):
+                if distances[node2] is not None:
+                    distance = distance1 + distances[node2] + distance2
+                    if best is None or distance < best[0]:
+                        best = (distance, node1, node2)
+        return best
+
+    def getDistance(self, pos1, pos2):
+        "Returns the maze distance between two open cells, or None if there is no path."
+        if pos1 == pos2:
+            return 0
+        route = self._bestRoute(pos1, pos2)
+        if route is None:
+            return None
+        return route[0]
+
+    def getClosest(self, position, targets):
+        """
+        Returns (distance, cell) for the cell nearest to position among the
+        cells set in the targets Grid, or None if none of them can be reached.
+        Corridors are scanned cell by cell, but only nodes go through the
+        priority queue.
+        """
+        x, y = position
+        if targets[x][y]:
+            return (0, position)
+
+        def firstTarget(cells, distance):
+            for cellx, celly in cells:
+                distance += 1
+                if targets[cellx][celly]:
+                    return (distance, (cellx, celly))
+            return None
+
+        best = None
+        if position in self.nodeIndex:
+            heap = [(0, self.nodeIndex[position])]
+        else:
+            # look both ways along the corridor position is in
+            edge, offset = self.cellEdge[position]
+            start, end, interior = self.edges[edge]
+            for found in [firstTarget(reversed(interior[:offset]), 0),
+                          firstTarget(interior[offset + 1:], 0)]:
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = found
+            heap = [(offset + 1, start), (len(interior) - offset, end)]
+            heapq.heapify(heap)
+
+        distances = {}
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if best is not None and distance >= best[0]:
+                break
+            if node in distances:
+                continue
+            distances[node] = distance
+            nodex, nodey = self.nodes[node]
+            if targets[nodex][nodey]:
+                best = (distance, self.nodes[node])
+                break
+            for edge, other, length in self.adjacency[node]:
+                start, end, interior = self.edges[edge]
+                if start == end:
+                    walks = [interior, interior[::-1]]
+                elif start == node:
+                    walks = [interior]
+                else:
+                    walks = [interior[::-1]]
+                for walk in walks:
+                    found = firstTarget(walk, distance)
+                    if found is not None and (best is None or found[0] < best[0]):
+                        best = found
+                if other not in distances:
+                    heapq.heappush(heap, (distance + length, other))
+        return best
+
+    def _cellsToNode(self, cell, node):
+        "Returns the cells walked from cell to the given end of its corridor."
+        if cell in self.nodeIndex:
+            return []
+        edge, offset = self.cellEdge[cell]
+        start, end, interior = self.edges[edge]
+        if node == start and (node != end or offset + 1 <= len(interior) - offset):
+            return list(reversed(interior[:offset])) + [self.nodes[start]]
+        return list(interior[offset + 1:]) + [self.nodes[end]]
+
+    def getPath(self, pos1, pos2):
+        """
+        Returns a shortest list of actions from pos1 to pos2, or None if there
+        is no path.
+        """
+        if pos1 == pos2:
+            return []
+        route = self._bestRoute(pos1, pos2)
+        if route is None:
+            return None
+        distance, node1, node2 = route
+        if node1 is None:
+            # straight along the shared corridor
+            edge, offset1 = self.cellEdge[pos1]
+            offset2 = self.cellEdge[pos2][1]
+            interior = self.edges[edge][2]
+            if offset1 < offset2:
+                cells = list(interior[offset1 + 1:offset2 + 1])
+            else:
+                cells = list(reversed(interior[offset2:offset1]))
+        else:
+            cells = self._cellsToNode(pos1, node1)
+            # the corridors between the two nodes, found backwards from node2
+            previous = self._distancesFrom(node1)[1]
+            middle = []
+            node = node2
+            while node != node1:
+                edge, before = previous[node]
+                start, end, interior = self.edges[edge]
+                walk = list(interior) if before == start else list(reversed(interior))
+                middle = walk + [self.nodes[node]] + middle
+                node = before
+            cells += middle
+            if pos2 not in self.nodeIndex:
+                cells += list(reversed(self._cellsToNode(pos2, node2)))[1:] + [pos2]
+        actions = []
+        x, y = pos1
+        for nextx, nexty in cells:
+            actions.append(Actions.vectorToDirection((nextx - x, nexty - y)))
+            x, y = nextx, nexty
+        return actions
+
+class WallsCache:
+    """
+    Values built from a walls Grid, shared between all the walls grids with
+    the same contents. build is called with a copy of the walls the first
+    time grids with those contents are seen.
+
+    Grids already looked up are also found by id. They are only weakly
+    referenced, so the walls of layouts copied for every move (as Game.run
+    does) are dropped from the cache with their layout.
+    """
+    def __init__(self, build):
+        self.build = build
+        self.byWalls = {}
+        self.byId = {}
+
+    def get(self, walls):
+        # hashing a Grid walks every cell, so first try the grid object itself
+        entry = self.byId.get(id(walls))
+        if entry is not None and entry[0]() is walls:
+            return entry[1]
+        value = self.byWalls.get(walls)
+        if value is None:
+            copy = walls.copy()
+            value = self.build(copy)
+            self.byWalls[copy] = value
+        key = id(walls)
+        self.byId[key] = (weakref.ref(walls, lambda ref: self._forget(key, ref)), value)
+        return value
+
+    def _forget(self, key, ref):
+        # the id may already belong to a newer grid
+        entry = self.byId.get(key)
+        if entry is not None and entry[0] is ref:
+            del self.byId[key]
+
+    def clear(self):
+        self.byWalls.clear()
+        self.byId.clear()
+
+CORRIDOR_GRAPHS = WallsCache(CorridorGraph)
+
+def getCorridorGraph(walls):
+    """
+    Returns the CorridorGraph of a walls Grid, building it on first use. Graphs
+    are shared between all the walls grids with the same contents.
+    """
+    return CORRIDOR_GRAPHS.get(walls)
+
 def getLayout(name, back = 2):
     if name.endswith('.lay'):
         layout = tryToLoad('layouts/' + name)
@@ -71,14 +71,35 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # Instrumentation of generateSuccessor, off by default since it costs a
+    # hash of every state. With exploredTracking 'states' the states passed to
+    # and returned by generateSuccessor are kept in explored (the autograder
+    # counts them); with 'count' only the number of successors generated is
+    # kept in exploredCount, which needs no memory however long the run is.
+    exploredTracking = None
     explored = set()
+    exploredCount = 0
+
+    def setExploredTracking(mode):
+        if mode not in (None, 'states', 'count'):
+            raise Exception('Unknown explored tracking: ' + str(mode))
+        GameState.exploredTracking = mode
+        GameState.getAndResetExplored()
+        GameState.getAndResetExploredCount()
+    setExploredTracking = staticmethod(setExploredTracking)
+
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
+        tmp = GameState.explored
         GameState.explored = set()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getAndResetExploredCount():
+        tmp = GameState.exploredCount
+        GameState.exploredCount = 0
+        return tmp
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
+
     def getLegalActions( self, agentIndex=0 ):
         """
         Returns the legal actions for the agent specified.
@@ -120,8 +141,11 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploredTracking == 'states':
+            GameState.explored.add(self)
+            GameState.explored.add(state)
+        elif GameState.exploredTracking == 'count':
+            GameState.exploredCount += 1
         return state
 
     def getLegalPacmanActions( self ):
@@ -342,7 +366,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.copyAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
@@ -361,8 +385,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood(x, y)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -371,11 +394,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if( position in state.getCapsules() ):
-            state.data.capsules.remove( position )
+            state.data.removeCapsule(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range( 1, len( state.data.agentStates ) ):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.copyAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod( consume )
 
 class GhostRules:
@@ -404,7 +427,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.copyAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0: speed /= 2.0
         vector = Actions.directionToVector( action, speed )
@@ -436,6 +459,7 @@ class GhostRules:
     def collide( state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.copyAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
@@ -523,6 +547,10 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--searchStats', dest='searchStats', type='choice', choices=['json'],
+                      help='Print the statistics of the search run by a search agent in the given format (json)', default=None)
+    parser.add_option('--traceMemory', dest='traceMemory', action='store_true',
+                      help='Trace memory so the search statistics include the peak memory; slows the search down several times', default=False)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -570,6 +598,11 @@ def readCommand( argv ):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['searchStats'] = options.searchStats
+    if options.traceMemory:
+        # lets the searches report their peak memory
+        import tracemalloc
+        tracemalloc.start()
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -625,7 +658,7 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, searchStats=None ):
     import __main__
     __main__.__dict__['_display'] = display
 
@@ -646,6 +679,10 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
         game.run()
         if not beQuiet: games.append(game)
 
+        if searchStats == 'json' and getattr(pacman, 'searchStats', None) is not None:
+            import json
+            print(json.dumps(pacman.searchStats.asDict()))
+
         if record:
             import time, pickle
             fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
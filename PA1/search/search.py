@@ -18,6 +18,10 @@ Pacman agents (in searchAgents.py).
 """
 
 import util
+import functools
+import time
+import tracemalloc
+from collections import OrderedDict
 
 class SearchProblem:
     """
@@ -71,6 +75,160 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+class SearchNode:
+    """
+    A node in the search tree. Each node keeps a pointer to the node it was
+    generated from, so the list of actions is rebuilt once at the goal instead
+    of being copied into every successor.
+    """
+    __slots__ = ('state', 'parent', 'action', 'pathCost')
+
+    def __init__(self, state, parent=None, action=None, pathCost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.pathCost = pathCost
+
+    def child(self, successor, action, stepCost):
+        return SearchNode(successor, self, action, self.pathCost + stepCost)
+
+    def path(self):
+        "Returns the list of actions that leads from the root to this node."
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
+
+class SearchStats:
+    """
+    Counters and timings for one run of a search function. Every search in
+    this file makes one and leaves it in problem.searchStats.
+
+      expanded        states whose successors were generated
+      generated       successors generated
+      duplicates      nodes skipped because their state was already handled
+      maxFrontier     largest size the frontier reached
+      peakMemory      peak bytes allocated by the search, or None unless
+                      tracemalloc is tracing
+      heuristicCalls  heuristic evaluations
+      heuristicTime   seconds spent in the heuristic
+      successorTime   seconds spent generating successors
+      totalTime       seconds spent in the whole search
+    """
+    def __init__(self, problem):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.maxFrontier = 0
+        self.peakMemory = None
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.successorTime = 0.0
+        self.totalTime = 0.0
+        problem.searchStats = self
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.startMemory = tracemalloc.get_traced_memory()[0]
+        self.startTime = time.perf_counter()
+
+    def successors(self, getSuccessors, state):
+        "Calls getSuccessors(state), counting and timing it."
+        start = time.perf_counter()
+        successors = getSuccessors(state)
+        self.successorTime += time.perf_counter() - start
+        self.expanded += 1
+        self.generated += len(successors)
+        return successors
+
+    def timeHeuristic(self, heuristic):
+        "Returns heuristic wrapped so that its calls are counted and timed."
+        def timedHeuristic(state, problem=None):
+            start = time.perf_counter()
+            value = heuristic(state, problem)
+            self.heuristicTime += time.perf_counter() - start
+            self.heuristicCalls += 1
+            return value
+        return timedHeuristic
+
+    def frontierSize(self, size):
+        if size > self.maxFrontier:
+            self.maxFrontier = size
+
+    def finish(self, path):
+        "Records the total time and memory of the search and returns path."
+        self.totalTime = time.perf_counter() - self.startTime
+        if tracemalloc.is_tracing():
+            self.peakMemory = tracemalloc.get_traced_memory()[1] - self.startMemory
+        return path
+
+    def asDict(self):
+        return {'expanded': self.expanded, 'generated': self.generated, 'duplicates': self.duplicates,
+                'maxFrontier': self.maxFrontier, 'peakMemory': self.peakMemory,
+                'heuristicCalls': self.heuristicCalls, 'heuristicTime': self.heuristicTime,
+                'successorTime': self.successorTime, 'totalTime': self.totalTime}
+
+def graphSearch(problem: SearchProblem, frontier, priority=None, stats=None):
+    """
+    Generic graph search shared by all of the strategies below.
+
+    frontier: an empty container with push, pop() and isEmpty(), such as
+    util.Stack, util.Queue or util.IndexedPriorityQueue. The order in which
+    it hands back nodes is what defines the search strategy.
+
+    priority: for priority queue frontiers, a function from a node to its
+    priority. Nodes are then added with frontier.update, so a state that is
+    already on the frontier only keeps its cheapest node.
+
+    The goal test is done when a node is popped, and a state is closed the
+    first time it is expanded. Closed states are kept in a set, so membership
+    tests are O(1) for any hashable state.
+
+    stats: the SearchStats to record into, if the caller already made one.
+    """
+    if stats is None:
+        stats = SearchStats(problem)
+
+    # a set to track expanded states
+    closed = set()
+
+    # add the root node to the frontier
+    root = SearchNode(problem.getStartState())
+    if priority is None:
+        frontier.push(root)
+    else:
+        frontier.push(root, priority(root))
+
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state = node.state
+
+        # check if the node is a goal state
+        if problem.isGoalState(state):
+            return stats.finish(node.path())
+
+        # expand the node if its state has not been expanded yet
+        if state not in closed:
+            closed.add(state)
+
+            # explore node's successors, skipping the ones already expanded
+            for successor, action, stepCost in stats.successors(problem.getSuccessors, state):
+                if successor not in closed:
+                    child = node.child(successor, action, stepCost)
+                    if priority is None:
+                        frontier.push(child)
+                    else:
+                        frontier.update(child, priority(child))
+                else:
+                    stats.duplicates += 1
+            stats.frontierSize(len(frontier))
+        else:
+            stats.duplicates += 1
+
+    return stats.finish(None)
+
 def depthFirstSearch(problem: SearchProblem):
     """
     Search the deepest nodes in the search tree first.
@@ -86,93 +244,21 @@ def depthFirstSearch(problem: SearchProblem):
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
     "*** YOUR CODE HERE ***"
-    # a LIFO stack 
-    frontier = util.Stack()
-
-    # a set to track visited nodes
-    visited = []
-
-    # add state to the stack and initial empty list for the path
-    frontier.push((problem.getStartState(), []))
-
-    while not frontier.isEmpty():
-        # chooses the shallowest node in the frontier
-        node, path = frontier.pop()
-
-        # check if the node is a goal state
-        if (problem.isGoalState(node)):
-            return path
-
-        # add node to the visited set if it has not been visited
-        if node not in visited:
-            visited.append(node)
-
-            # explore node's successors
-            for successor, action, stepCost in problem.getSuccessors(node):
-                frontier.push((successor, path + [action]))                    
-
-    return None
+    # a LIFO stack
+    return graphSearch(problem, util.Stack())
 
 def breadthFirstSearch(problem: SearchProblem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
-    # a FIFO queue 
-    frontier = util.Queue()
-
-    # a set to track visited nodes
-    visited = []
-
-    # add state to the queue and initial empty list for the path
-    frontier.push((problem.getStartState(), []))
-
-    while not frontier.isEmpty():
-        # chooses the shallowest node in the frontier
-        node, path = frontier.pop()
-
-        # check if the node is a goal state
-        if (problem.isGoalState(node)):
-            return path
-
-        # add node to the visited set if it has not been visited 
-        if node not in visited:
-            visited.append(node)
-
-            # explore node's successors
-            for successor, action, stepCost in problem.getSuccessors(node):
-                frontier.push((successor, path + [action]))                    
-
-    return None
+    # a FIFO queue
+    return graphSearch(problem, util.Queue())
 
 def uniformCostSearch(problem: SearchProblem):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
-    # a priority queue to track varying cost for each path
-    frontier = util.PriorityQueue()
-
-    # a set to track visited nodes
-    visited = []
-
-    # add state to the queue, initial empty list for the path, and cost so far for the priority queue to maintain
-    frontier.push((problem.getStartState(), [], 0), 0)
-
-    while not frontier.isEmpty():
-        # chooses the lowest-cost node 
-        node, path, cost = frontier.pop()
-
-        # check if the node is a goal state
-        if (problem.isGoalState(node)):
-            return path
-
-        # add node to the visited set if it has not been visited 
-        if node not in visited:
-            visited.append(node)
-
-            # explore node's successors
-            for successor, action, stepCost in problem.getSuccessors(node):
-                # update frontier if child is in frontier with higher path cost, else update will insert it to the priority queue
-                frontier.update((successor, path + [action], cost + stepCost), cost + stepCost)
-
-    return None
+    # a priority queue ordered by the cost so far, indexed by state
+    frontier = util.IndexedPriorityQueue(key=lambda node: node.state)
+    return graphSearch(problem, frontier, lambda node: node.pathCost)
 
 def nullHeuristic(state, problem=None):
     """
@@ -181,42 +267,589 @@ def nullHeuristic(state, problem=None):
     """
     return 0
 
-def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
-    "*** YOUR CODE HERE ***"
-    # a priority queue to track varying cost for each path
-    frontier = util.PriorityQueue()
+class MemoizedHeuristic:
+    """
+    Wraps a heuristic so that each state is only evaluated once. Values are
+    kept in a least recently used cache of at most maxSize states, and the
+    number of cache hits and misses is counted.
 
-    # a set to track visited nodes
-    visited = []
+    The problem is not part of the cache key, so a MemoizedHeuristic should
+    only be used for one problem.
+    """
+    def __init__(self, heuristic, maxSize=100000):
+        self.heuristic = heuristic
+        self.maxSize = maxSize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state, problem=None):
+        if state in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(state)
+            return self.cache[state]
+        self.misses += 1
+        value = self.heuristic(state, problem)
+        self.cache[state] = value
+        if len(self.cache) > self.maxSize:
+            self.cache.popitem(last=False)
+        return value
+
+    def __str__(self):
+        return '%d hits, %d misses, %d states cached' % (self.hits, self.misses, len(self.cache))
+
+def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic, heuristicCacheSize=0):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
 
-    # calculate heuristic cost 
-    heuristicCost = heuristic(problem.getStartState(), problem)
-    # add state to the queue, initial empty list for the path, and cost so far for the priority queue to maintain
-    frontier.push((problem.getStartState(), [], 0), 0 + heuristicCost)
+    With heuristicCacheSize > 0, heuristic values are memoized for up to that
+    many states, so a state generated again never pays for a second
+    evaluation. The cache is left in problem._heuristicCache.
+    """
+    "*** YOUR CODE HERE ***"
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    if heuristicCacheSize > 0:
+        heuristic = MemoizedHeuristic(heuristic, heuristicCacheSize)
+        problem._heuristicCache = heuristic
+
+    # a priority queue ordered by the cost so far plus the heuristic cost
+    frontier = util.IndexedPriorityQueue(key=lambda node: node.state)
+    priority = lambda node: node.pathCost + heuristic(node.state, problem)
+    return graphSearch(problem, frontier, priority, stats)
+
+def jumpPointSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    A* over jump points. Instead of getSuccessors, the problem provides
+    getJumpSuccessors(state), which returns triples (jumpPoint, actions, cost)
+    where 'actions' is the whole run of moves from state to jumpPoint. On a
+    maze, a run follows a corridor to the next junction or goal, so only those
+    cells are ever expanded. The path found costs the same as the one found by
+    aStarSearch with the same heuristic.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    frontier = util.IndexedPriorityQueue(key=lambda node: node.state)
+    priority = lambda node: node.pathCost + heuristic(node.state, problem)
+    closed = set()
+    root = SearchNode(problem.getStartState())
+    frontier.push(root, priority(root))
 
     while not frontier.isEmpty():
-        # chooses the lowest-cost node 
-        node, path, cost = frontier.pop()
+        node = frontier.pop()
+        state = node.state
+
+        if problem.isGoalState(state):
+            # each node's action is the run of moves that led to it
+            return stats.finish([action for run in node.path() for action in run])
+
+        if state not in closed:
+            closed.add(state)
+            for successor, actions, cost in stats.successors(problem.getJumpSuccessors, state):
+                if successor not in closed:
+                    child = node.child(successor, actions, cost)
+                    frontier.update(child, priority(child))
+                else:
+                    stats.duplicates += 1
+            stats.frontierSize(len(frontier))
+        else:
+            stats.duplicates += 1
+
+    return stats.finish(None)
+
+def weightedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, weight=2.0):
+    """
+    A* with the heuristic cost multiplied by weight, which makes the search
+    greedier. With a consistent heuristic the path found costs at most weight
+    times the optimal cost; weight=1 is plain A*.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    weight = float(weight)
+    frontier = util.IndexedPriorityQueue(key=lambda node: node.state)
+    priority = lambda node: node.pathCost + weight * heuristic(node.state, problem)
+    return graphSearch(problem, frontier, priority, stats)
+
+def anytimeRepairingAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, weight=3.0, decrement=0.5, deadline=10.0):
+    """
+    Anytime repairing A* (ARA*): a weighted A* search is run with a high
+    weight to find a first path quickly, then the weight is lowered step by
+    step and the search is repaired rather than restarted, each time finding a
+    path that costs at most weight times the optimal cost. States whose cost
+    improved after they were expanded are kept aside and put back on the
+    frontier for the next step.
+
+    The improvements stop once deadline seconds have passed (the first path
+    is always searched for to the end) or once the weight reaches 1, in which
+    case the path is optimal. The best path found so far is returned. Each
+    step that finished is recorded in problem.anytimeSolutions as (weight,
+    cost, seconds), so its weight bounds the cost of the path returned.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    weight, decrement = float(weight), float(decrement)
+    stopTime = time.perf_counter() + float(deadline)
+    problem.anytimeSolutions = []
+
+    start = problem.getStartState()
+    cost = {start: 0}
+    parents = {start: None}
+    heuristicCosts = {}
+    def priority(state):
+        if state not in heuristicCosts:
+            heuristicCosts[state] = heuristic(state, problem)
+        return cost[state] + weight * heuristicCosts[state]
+
+    frontier = util.IndexedPriorityQueue()
+    frontier.push(start, priority(start))
+    openStates = set([start])
+    inconsistent = set()
+    goal = None
+
+    while True:
+        # one weighted search, until no state on the frontier can beat the path found
+        closed = set()
+        interrupted = False
+        while not frontier.isEmpty() and (goal is None or cost[goal] > frontier.getMinPriority()):
+            if goal is not None and time.perf_counter() > stopTime:
+                interrupted = True
+                break
+            state = frontier.pop()
+            openStates.discard(state)
+            closed.add(state)
+            if problem.isGoalState(state):
+                if goal is None or cost[state] < cost[goal]:
+                    goal = state
+                continue
+            for successor, action, stepCost in stats.successors(problem.getSuccessors, state):
+                newCost = cost[state] + stepCost
+                if successor in cost and newCost >= cost[successor]:
+                    stats.duplicates += 1
+                    continue
+                cost[successor] = newCost
+                parents[successor] = (state, action)
+                if successor in closed:
+                    inconsistent.add(successor)
+                else:
+                    frontier.push(successor, priority(successor))
+                    openStates.add(successor)
+            stats.frontierSize(len(frontier))
+
+        if goal is None:
+            return stats.finish(None)
+        if interrupted:
+            break
+        problem.anytimeSolutions.append((weight, cost[goal], time.perf_counter() - stats.startTime))
+        if weight <= 1 or time.perf_counter() > stopTime:
+            break
+
+        # lower the weight and requeue the frontier and the inconsistent states
+        weight = max(1.0, weight - decrement)
+        openStates |= inconsistent
+        inconsistent = set()
+        frontier = util.IndexedPriorityQueue()
+        for state in openStates:
+            frontier.push(state, priority(state))
+
+    actions = []
+    state = goal
+    while parents[state] is not None:
+        state, action = parents[state]
+        actions.append(action)
+    actions.reverse()
+    return stats.finish(actions)
+
+def beamSearch(problem: SearchProblem, heuristic=nullHeuristic, beamWidth=100):
+    """
+    Search level by level, keeping only the beamWidth nodes of each level
+    with the lowest cost plus heuristic cost. Memory and time per level are
+    bounded, but the path found may not be optimal, and a path can be missed
+    altogether if the beam is too narrow.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    beamWidth = int(beamWidth)
+    root = SearchNode(problem.getStartState())
+    level = [root]
+    seen = set([root.state])
+
+    while level:
+        # the level is sorted, so the first goal in it is the cheapest
+        for node in level:
+            if problem.isGoalState(node.state):
+                return stats.finish(node.path())
+
+        # the cheapest new node for each state reached from the level
+        children = {}
+        for node in level:
+            for successor, action, stepCost in stats.successors(problem.getSuccessors, node.state):
+                if successor in seen or (successor in children and children[successor].pathCost <= node.pathCost + stepCost):
+                    stats.duplicates += 1
+                    continue
+                children[successor] = node.child(successor, action, stepCost)
+
+        ranked = sorted(children.values(), key=lambda child: child.pathCost + heuristic(child.state, problem))
+        level = ranked[:beamWidth]
+        seen.update(node.state for node in level)
+        stats.frontierSize(len(children))
+
+    return stats.finish(None)
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=100000):
+    """
+    Iterative deepening A*: a series of depth first searches, each one cut off
+    where the cost plus the heuristic cost goes over a bound. The first bound
+    is the heuristic cost of the start state, and each next bound is the
+    smallest value that went over the previous one. With an admissible
+    heuristic the first path found is optimal.
+
+    Only the current path is kept, plus a table of the cheapest cost at which
+    each state was reached during the current iteration, which prunes repeated
+    paths. The table holds at most maxNodes states.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return stats.finish([])
+    maxNodes = int(maxNodes)
+    bound = heuristic(start, problem)
+    while True:
+        path, bound = _costBoundedSearch(problem, heuristic, start, bound, maxNodes, stats)
+        if path is not None:
+            return stats.finish(path)
+        # nothing went over the bound, so there is no path at all
+        if bound is None:
+            return stats.finish(None)
+
+def _costBoundedSearch(problem, heuristic, start, bound, maxNodes, stats):
+    """
+    One iteration of IDA*. Returns (path, None) if a goal is found within the
+    bound, else (None, the smallest cost plus heuristic cost over the bound).
+    """
+    nextBound = None
+    bestCost = {start: 0}
+    onPath = set([start])
+    actions = []
+    # each frame is (state, cost so far, iterator over its successors)
+    stack = [(start, 0, iter(stats.successors(problem.getSuccessors, start)))]
+
+    while stack:
+        state, cost, successors = stack[-1]
+        for successor, action, stepCost in successors:
+            if successor in onPath:
+                stats.duplicates += 1
+                continue
+            childCost = cost + stepCost
+            if successor in bestCost and bestCost[successor] <= childCost:
+                stats.duplicates += 1
+                continue
+            f = childCost + heuristic(successor, problem)
+            if f > bound:
+                if nextBound is None or f < nextBound:
+                    nextBound = f
+                continue
+            actions.append(action)
+            if problem.isGoalState(successor):
+                return actions, None
+            if successor in bestCost or len(bestCost) < maxNodes:
+                bestCost[successor] = childCost
+            onPath.add(successor)
+            stack.append((successor, childCost, iter(stats.successors(problem.getSuccessors, successor))))
+            stats.frontierSize(len(stack))
+            break
+        else:
+            # every successor has been tried, so backtrack
+            stack.pop()
+            onPath.discard(state)
+            if actions:
+                actions.pop()
+
+    return None, nextBound
+
+class BoundedSearchNode(SearchNode):
+    """
+    A node of memoryBoundedAStarSearch. Besides the search node fields it keeps
+    its f-value, its depth, the successors it has not generated yet (None
+    until it is first picked), the children in memory, and the backed-up
+    f-value, action and step cost of each child forgotten to free memory.
+    """
+    __slots__ = ('f', 'depth', 'pending', 'children', 'forgotten')
 
-        # check if the node is a goal state
-        if (problem.isGoalState(node)):
-            return path
+    def __init__(self, state, parent=None, action=None, pathCost=0, f=0):
+        SearchNode.__init__(self, state, parent, action, pathCost)
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.pending = None
+        self.children = []
+        self.forgotten = {}
 
-        # add node to the visited set if it has not been visited 
-        if node not in visited:
-            visited.append(node)
+def memoryBoundedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=100000):
+    """
+    SMA*: A* that never keeps more than maxNodes search nodes in memory. The
+    node picked (lowest f, deepest first) generates one successor at a time,
+    and once all of them have been generated its f-value is backed up to the
+    lowest one below it. When memory is full the worst leaf (highest f,
+    shallowest first) is forgotten and its f-value kept by its parent, which
+    generates it again if that value becomes the best one.
+
+    A node at depth maxNodes - 1 that is not a goal gets f = inf, since its
+    path already fills memory. With an admissible heuristic the path found is
+    optimal whenever some optimal path is at most maxNodes - 1 steps long.
+    """
+    stats = SearchStats(problem)
+    heuristic = stats.timeHeuristic(heuristic)
+    maxNodes = int(maxNodes)
+    inf = float('inf')
+    start = problem.getStartState()
+    root = BoundedSearchNode(start, f=heuristic(start, problem))
+
+    # the frontier holds the nodes that still have successors to generate,
+    # best first; leaves holds the nodes without children in memory, worst
+    # first
+    frontier, leaves = util.IndexedPriorityQueue(), util.IndexedPriorityQueue()
+    # the cheapest node in memory for each state, to drop dominated duplicates
+    inMemory = {start: root}
+    numNodes = 1
+
+    def requeue(node):
+        if node.pending is None or node.pending or node.forgotten:
+            frontier.push(node, (node.f, -node.depth))
+        else:
+            frontier.remove(node)
+        if node.children:
+            leaves.remove(node)
+        else:
+            leaves.push(node, (-node.f, node.depth))
+
+    def backUp(node):
+        # once every successor of a node has been generated, its f-value is
+        # the lowest one below it
+        while node is not None and node.pending == []:
+            values = [child.f for child in node.children] + [f for f, _, _ in node.forgotten.values()]
+            f = min(values) if values else inf
+            if f == node.f:
+                break
+            node.f = f
+            requeue(node)
+            node = node.parent
+
+    def forget(node):
+        leaves.remove(node)
+        frontier.remove(node)
+        if inMemory.get(node.state) is node:
+            del inMemory[node.state]
+        parent = node.parent
+        parent.children.remove(node)
+        parent.forgotten[node.state] = (node.f, node.action, node.pathCost - parent.pathCost)
+        requeue(parent)
+
+    requeue(root)
+    while not frontier.isEmpty():
+        if frontier.getMinPriority()[0] == inf:
+            return stats.finish(None)
+        node = frontier.peek()
+
+        if node.pending is None:
+            if problem.isGoalState(node.state):
+                return stats.finish(node.path())
+            # skip the states on the node's own path
+            ancestors = set()
+            ancestor = node.parent
+            while ancestor is not None:
+                ancestors.add(ancestor.state)
+                ancestor = ancestor.parent
+            node.pending = [successor for successor in stats.successors(problem.getSuccessors, node.state)
+                            if successor[0] not in ancestors]
+            node.pending.reverse()
+
+        # the next new successor, or else the forgotten one with the lowest f
+        if node.pending:
+            successor, action, stepCost = node.pending.pop()
+            f = None
+        elif node.forgotten:
+            successor = min(node.forgotten, key=lambda state: node.forgotten[state][0])
+            f, action, stepCost = node.forgotten.pop(successor)
+        else:
+            # a dead end
+            backUp(node)
+            requeue(node)
+            continue
+
+        pathCost = node.pathCost + stepCost
+        known = inMemory.get(successor)
+        if known is not None and known.pathCost <= pathCost and known.depth <= node.depth + 1:
+            # anything found below it is found at least as cheaply and as
+            # shallowly below known
+            stats.duplicates += 1
+        else:
+            child = BoundedSearchNode(successor, node, action, pathCost)
+            if child.depth >= maxNodes - 1 and not problem.isGoalState(successor):
+                # its path fills memory, so it can never have a child
+                child.f = inf
+            elif f is None:
+                child.f = max(node.f, pathCost + heuristic(successor, problem))
+            else:
+                child.f = f
+            node.children.append(child)
+            if known is None or (pathCost, child.depth) < (known.pathCost, known.depth):
+                inMemory[successor] = child
+            # free memory by forgetting the worst leaves; node has a child now,
+            # so it is not one of them
+            leaves.remove(node)
+            while numNodes >= maxNodes and not leaves.isEmpty():
+                forget(leaves.peek())
+                numNodes -= 1
+            numNodes += 1
+            requeue(child)
+
+        requeue(node)
+        backUp(node)
+        stats.frontierSize(len(frontier))
+
+    return stats.finish(None)
+
+def _joinPaths(meet, forwardParents, backwardParents):
+    """
+    Returns the actions from the start to meet, followed by the actions from
+    meet to the goal, following the parent pointers of both searches.
+    """
+    actions = []
+    state = meet
+    while forwardParents[state] is not None:
+        state, action = forwardParents[state]
+        actions.append(action)
+    actions.reverse()
+    state = meet
+    while backwardParents[state] is not None:
+        state, action = backwardParents[state]
+        actions.append(action)
+    return actions
+
+def _expandLevel(frontier, expand, parents, depth, otherDepth, stats):
+    """
+    Expands a whole BFS level from one side of a bidirectional search. Returns
+    the next level and the cheapest state seen by both sides (or None).
+    """
+    nextFrontier = []
+    best, meet = None, None
+    for state in frontier:
+        for neighbor, action, stepCost in expand(state):
+            if neighbor not in depth:
+                depth[neighbor] = depth[state] + 1
+                parents[neighbor] = (state, action)
+                nextFrontier.append(neighbor)
+            else:
+                stats.duplicates += 1
+            if neighbor in otherDepth:
+                total = depth[neighbor] + otherDepth[neighbor]
+                if best is None or total < best:
+                    best, meet = total, neighbor
+    return nextFrontier, meet
+
+def bidirectionalBreadthFirstSearch(problem: SearchProblem):
+    """
+    Search the shallowest nodes from both the start and the goal, and stop when
+    the two searches meet.
 
-            # explore node's successors
-            for successor, action, stepCost in problem.getSuccessors(node):
-                # update frontier if child is in frontier with higher path cost (cost + heuristic cost), else update will insert it to the priority queue
-                heuristicCost = heuristic(successor, problem)
-                frontier.update((successor, path + [action], cost + stepCost), cost + stepCost + heuristicCost)
+    The problem needs a single goal, returned by problem.getGoalState(), and a
+    problem.getPredecessors(state) that returns triples (predecessor, action,
+    stepCost) where 'action' leads from 'predecessor' to 'state'. Like BFS,
+    the path returned is shortest in number of actions.
+    """
+    stats = SearchStats(problem)
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if start == goal:
+        return stats.finish([])
+    getSuccessors = functools.partial(stats.successors, problem.getSuccessors)
+    getPredecessors = functools.partial(stats.successors, problem.getPredecessors)
+
+    # parents map each state to (neighbor, action) towards the start or the goal
+    forwardParents, backwardParents = {start: None}, {goal: None}
+    forwardDepth, backwardDepth = {start: 0}, {goal: 0}
+    forwardFrontier, backwardFrontier = [start], [goal]
+
+    while forwardFrontier and backwardFrontier:
+        # grow the smaller frontier by one whole level
+        if len(forwardFrontier) <= len(backwardFrontier):
+            forwardFrontier, meet = _expandLevel(forwardFrontier, getSuccessors,
+                                                 forwardParents, forwardDepth, backwardDepth, stats)
+        else:
+            backwardFrontier, meet = _expandLevel(backwardFrontier, getPredecessors,
+                                                  backwardParents, backwardDepth, forwardDepth, stats)
+        stats.frontierSize(len(forwardFrontier) + len(backwardFrontier))
+        if meet is not None:
+            return stats.finish(_joinPaths(meet, forwardParents, backwardParents))
+
+    return stats.finish(None)
+
+def bidirectionalUniformCostSearch(problem: SearchProblem):
+    """
+    Search the node of least total cost from both the start and the goal. The
+    search stops once the cheapest nodes left on the two frontiers cannot lead
+    to a cheaper path than the best one where the searches have met.
 
-    return None
+    The problem needs the same getGoalState and getPredecessors as for
+    bidirectionalBreadthFirstSearch.
+    """
+    stats = SearchStats(problem)
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if start == goal:
+        return stats.finish([])
+    getSuccessors = functools.partial(stats.successors, problem.getSuccessors)
+    getPredecessors = functools.partial(stats.successors, problem.getPredecessors)
+
+    forwardParents, backwardParents = {start: None}, {goal: None}
+    forwardCost, backwardCost = {start: 0}, {goal: 0}
+    forwardClosed, backwardClosed = set(), set()
+    forwardFrontier, backwardFrontier = util.IndexedPriorityQueue(), util.IndexedPriorityQueue()
+    forwardFrontier.push(start, 0)
+    backwardFrontier.push(goal, 0)
+    best, meet = None, None
+
+    while not forwardFrontier.isEmpty() and not backwardFrontier.isEmpty():
+        if best is not None and forwardFrontier.getMinPriority() + backwardFrontier.getMinPriority() >= best:
+            break
+
+        # expand the side with the smaller frontier
+        if len(forwardFrontier) <= len(backwardFrontier):
+            frontier, expand, parents, cost, closed, otherCost = \
+                forwardFrontier, getSuccessors, forwardParents, forwardCost, forwardClosed, backwardCost
+        else:
+            frontier, expand, parents, cost, closed, otherCost = \
+                backwardFrontier, getPredecessors, backwardParents, backwardCost, backwardClosed, forwardCost
+
+        state = frontier.pop()
+        closed.add(state)
+        for neighbor, action, stepCost in expand(state):
+            if neighbor in closed:
+                stats.duplicates += 1
+                continue
+            newCost = cost[state] + stepCost
+            if neighbor not in cost or newCost < cost[neighbor]:
+                cost[neighbor] = newCost
+                parents[neighbor] = (state, action)
+                frontier.update(neighbor, newCost)
+            if neighbor in otherCost:
+                total = cost[neighbor] + otherCost[neighbor]
+                if best is None or total < best:
+                    best, meet = total, neighbor
+        stats.frontierSize(len(forwardFrontier) + len(backwardFrontier))
+
+    if meet is None:
+        return stats.finish(None)
+    return stats.finish(_joinPaths(meet, forwardParents, backwardParents))
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bdbfs = bidirectionalBreadthFirstSearch
+bducs = bidirectionalUniformCostSearch
+idastar = iterativeDeepeningAStarSearch
+jps = jumpPointSearch
+smastar = memoryBoundedAStarSearch
+wastar = weightedAStarSearch
+arastar = anytimeRepairingAStarSearch
+beam = beamSearch
@@ -34,13 +34,21 @@ description for details.
 Good luck and happy searching!
 """
 
-from typing import List, Tuple, Any
+from typing import Tuple, Any
+from array import array
+import concurrent.futures
+import heapq
 from game import Directions
 from game import Agent
 from game import Actions
-import util
+from game import BitGrid
+from layout import WallsCache
+from layout import getCorridorGraph
+from layout import CORRIDOR_GRAPHS
 import time
+import functools
 import search
+import os
 import sys
 import pacman
 
@@ -72,19 +80,36 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      bidirectionalBreadthFirstSearch or bdbfs
+      bidirectionalUniformCostSearch or bducs
+      jumpPointSearch or jps
+      weightedAStarSearch or wastar (weight=2.0)
+      anytimeRepairingAStarSearch or arastar (weight=3.0, decrement=0.5, deadline=10.0)
+      beamSearch or beam (beamWidth=100)
 
+    Any other agent arguments go to the search function, for example
+    heuristicCacheSize=10000 memoizes heuristic values in aStarSearch, and
+    weight=1.5 sets the weight of weightedAStarSearch.
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', **searchArgs):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
-        if 'heuristic' not in func.__code__.co_varnames:
+        takesHeuristic = 'heuristic' in func.__code__.co_varnames
+
+        # Any other agent arguments (e.g. maxNodes=5000) are passed on to the search function
+        searchArgs = parseSearchArgs(func, searchArgs)
+        if searchArgs:
+            print('[SearchAgent] using search arguments %s' % searchArgs)
+            func = functools.partial(func, **searchArgs)
+
+        if not takesHeuristic:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
         else:
@@ -122,6 +147,9 @@ class SearchAgent(Agent):
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_heuristicCache' in dir(problem): print('Heuristic cache: %s' % problem._heuristicCache)
+        # counters and timings of the search, see search.SearchStats
+        self.searchStats = getattr(problem, 'searchStats', None)
 
     def getAction(self, state):
         """
@@ -139,6 +167,56 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def parseSearchArgs(func, searchArgs):
+    """
+    Checks that every extra agent argument is a parameter of the search
+    function, and turns the numeric ones (which arrive from the command line as
+    strings) into numbers.
+    """
+    code = func.__code__
+    parameters = code.co_varnames[:code.co_argcount]
+    parsed = {}
+    for key, value in searchArgs.items():
+        if key not in parameters:
+            raise AttributeError(key + ' is not an argument of the search function ' + func.__name__ + '.')
+        if isinstance(value, str):
+            try:
+                value = int(value)
+            except ValueError:
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass
+        parsed[key] = value
+    return parsed
+
+def _buildNeighborTable(walls):
+    table = {}
+    for x in range(walls.width):
+        for y in range(walls.height):
+            if walls[x][y]:
+                continue
+            neighbors = []
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not walls[nextx][nexty]:
+                    neighbors.append(((nextx, nexty), action, 1 << (nextx * walls.height + nexty)))
+            table[(x, y)] = tuple(neighbors)
+    return table
+
+_neighborTables = WallsCache(_buildNeighborTable)
+
+def getNeighborTable(walls):
+    """
+    Returns a table from each open cell of a walls Grid to a tuple of
+    (neighbor, action, bit) triples for its open neighbors, in the order
+    North, South, East, West. 'bit' is the neighbor's bit in a BitGrid of the
+    same size. Tables are shared between all the walls grids with the same
+    contents, so every search problem on a layout uses the same one.
+    """
+    return _neighborTables.get(walls)
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -164,6 +242,7 @@ class PositionSearchProblem(search.SearchProblem):
         self.goal = goal
         self.costFn = costFn
         self.visualize = visualize
+        self.neighbors = getNeighborTable(self.walls)
         if warn and (gameState.getNumFood() != 1 or not gameState.hasFood(*goal)):
             print('Warning: this does not look like a regular search maze')
 
@@ -198,15 +277,8 @@ class PositionSearchProblem(search.SearchProblem):
          cost of expanding to that successor
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState)) for nextState, action, bit in self.neighbors[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -216,6 +288,72 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getJumpSuccessors(self, state):
+        """
+        Returns the jump points reachable from state, for jumpPointSearch, as
+        triples (jumpPoint, actions, cost). From each open neighbour the run
+        keeps going while it is in a corridor cell (one way in and one way out)
+        that is not a goal, so it stops at goals, junctions and dead ends. Runs
+        that end in a dead end without a goal are dropped.
+        """
+        successors = []
+        for (nextx, nexty), action, bit in self.neighbors[state]:
+            actions = [action]
+            cost = self.costFn((nextx, nexty))
+            deadEnd = False
+            while (nextx, nexty) != state and not self.isGoalState((nextx, nexty)):
+                exits = self._corridorExits((nextx, nexty), actions[-1])
+                if len(exits) != 1:
+                    deadEnd = len(exits) == 0
+                    break
+                (nextx, nexty), exitAction = exits[0]
+                actions.append(exitAction)
+                cost += self.costFn((nextx, nexty))
+            # skip dead ends, and corridors that loop back to where they started
+            if deadEnd or (nextx, nexty) == state:
+                continue
+            successors.append( ( (nextx, nexty), tuple(actions), cost) )
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def _corridorExits(self, position, heading):
+        """
+        Returns the (cell, action) moves out of position, other than going back
+        against heading.
+        """
+        back = Actions.reverseDirection(heading)
+        return [(nextState, action) for nextState, action, bit in self.neighbors[position] if action != back]
+
+    def getGoalState(self):
+        "Returns the single goal, for the bidirectional searches."
+        return self.goal
+
+    def getPredecessors(self, state):
+        """
+        Returns the states from which state can be reached in one move, as
+        triples (predecessor, action, stepCost) where 'action' leads from
+        'predecessor' to state. Used by the backward half of the bidirectional
+        searches.
+        """
+        # moves are reversible, so the predecessors are the neighbors
+        cost = self.costFn(state)
+        predecessors = [(previous, Actions.reverseDirection(action), cost)
+                        for previous, action, bit in self.neighbors[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -295,6 +433,12 @@ class CornersProblem(search.SearchProblem):
         # in initializing the problem
         "*** YOUR CODE HERE ***"
 
+        # each corner owns one bit of the visited corners mask
+        self.cornerBits = dict((corner, 1 << i) for i, corner in enumerate(self.corners))
+        self.allCorners = (1 << len(self.corners)) - 1
+        self.neighbors = getNeighborTable(self.walls)
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
+
     def getStartState(self):
         """
         Returns the start state (in your state space, not the full Pacman state
@@ -302,8 +446,9 @@ class CornersProblem(search.SearchProblem):
         """
         "*** YOUR CODE HERE ***"
         
-        # start state consists of pacman's position and a list to track all the visited corners
-        return (self.startingPosition, [])
+        # start state consists of pacman's position and a bitmask of the visited corners,
+        # which already includes the starting position if it is a corner
+        return (self.startingPosition, self.cornerBits.get(self.startingPosition, 0))
 
     def isGoalState(self, state: Any):
         """
@@ -312,7 +457,7 @@ class CornersProblem(search.SearchProblem):
         "*** YOUR CODE HERE ***"
         
         # found all the corners
-        return (len(state[1]) == len(self.corners))
+        return state[1] == self.allCorners
 
     def getSuccessors(self, state: Any):
         """
@@ -326,28 +471,14 @@ class CornersProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   nextx, nexty = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[nextx][nexty]
-
-            "*** YOUR CODE HERE ***"
-
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                visitedCorners = state[1].copy()
+        "*** YOUR CODE HERE ***"
 
-                # if next state is in corners and has not been added/visited, then append it to the list
-                if (nextState in self.corners) and (nextState not in visitedCorners):
-                    visitedCorners.append(nextState)
-                
-                successors.append( ((nextState, visitedCorners), action, 1) )
+        # the open neighbors of each cell come from the layout's neighbor table
+        position, visitedCorners = state
+        cornerBits = self.cornerBits
+        for nextState, action, bit in self.neighbors[position]:
+            # if next state is a corner, set its bit in the visited corners mask
+            successors.append( ((nextState, visitedCorners | cornerBits.get(nextState, 0)), action, 1) )
 
         self._expanded += 1 # DO NOT CHANGE
         return successors
@@ -383,62 +514,124 @@ def cornersHeuristic(state: Any, problem: CornersProblem):
     walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
 
     "*** YOUR CODE HERE ***"
-    
-    # current node
-    node = state[0]
 
-    # track visited corners without modifying the actual game state to look forward
-    visitedCorners = state[1].copy()
+    # shortest tours through the corners, computed once per problem
+    if 'tourCosts' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = getMazeDistances(walls)
+        problem.heuristicInfo['tourCosts'] = cornerTourCosts(corners, problem.heuristicInfo['mazeDistances'])
+    mazeDistances = problem.heuristicInfo['mazeDistances']
+    tourCosts = problem.heuristicInfo['tourCosts']
+
+    position, visitedCorners = state
+    remaining = problem.allCorners & ~visitedCorners
+    if remaining == 0:
+        return 0
+
+    # the exact cost of walking to one of the remaining corners and then touring
+    # the rest; infinite if a remaining corner is a wall or cut off
+    heuristicCost = float('inf')
+    for i, corner in enumerate(corners):
+        bit = 1 << i
+        if remaining & bit:
+            cost = mazeDistanceOrInfinity(mazeDistances, position, corner) + tourCosts[i][remaining ^ bit]
+            if cost < heuristicCost:
+                heuristicCost = cost
 
-    # minimum cost from the state to a goal
-    heuristicCost = 0
+    return heuristicCost
+
+def mazeDistanceOrInfinity(mazeDistances, pos1, pos2):
+    "The maze distance, or infinity if either cell is a wall or there is no path."
+    if pos1 not in mazeDistances.cellIndex or pos2 not in mazeDistances.cellIndex:
+        return float('inf')
+    distance = mazeDistances.getDistance(pos1, pos2)
+    return float('inf') if distance is None else distance
 
-    # loop until all the corners distances have been calculated
-    while len(visitedCorners) != len(corners):
-        # store distances to remaining corners from a given state
-        cornerDistances = []
+def cornerTourCosts(corners, mazeDistances):
+    """
+    Returns a table where tourCosts[i][mask] is the length of the shortest walk
+    that starts at corners[i] and visits every corner whose bit is set in mask,
+    or infinity if one of them is a wall or cannot be reached.
+    """
+    for corner in corners:
+        if corner in mazeDistances.cellIndex:
+            mazeDistances.computeFrom(corner)
+    numCorners = len(corners)
+    tourCosts = [[0] * (1 << numCorners) for _ in range(numCorners)]
+    # smaller masks are always filled in before the masks that contain them
+    for mask in range(1, 1 << numCorners):
+        for i in range(numCorners):
+            best = float('inf')
+            for j in range(numCorners):
+                bit = 1 << j
+                if mask & bit:
+                    cost = mazeDistanceOrInfinity(mazeDistances, corners[i], corners[j]) + tourCosts[j][mask ^ bit]
+                    if cost < best:
+                        best = cost
+            tourCosts[i][mask] = best
+    return tourCosts
 
-        for corner in corners:
-            if corner not in visitedCorners:
+class AStarCornersAgent(SearchAgent):
+    "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
+    def __init__(self):
+        self.searchFunction = lambda prob: search.aStarSearch(prob, cornersHeuristic)
+        self.searchType = CornersProblem
 
-                # calculate manhattan distance i.e. h(s)
-                distance = util.manhattanDistance(node, corner)
+class FoodSearchState:
+    """
+    A search state of the FoodSearchProblem.
 
-                # append calculated distance with its corner as a tuple
-                cornerDistances.append((distance, corner))
+      position: a tuple (x,y) of integers specifying Pacman's position
+      food:     an int with bit x * height + y set for every remaining dot, the
+                same encoding as BitGrid.bits
+      numFood:  the number of dots remaining, kept up to date as dots are eaten
 
-        # find the minimum distance with its corner
-        d, c = min(cornerDistances)
+    States are immutable and hash on (position, food), with the hash computed
+    once when the state is created. A state still unpacks like the old
+    (position, foodGrid) tuples, with the food decoded into a BitGrid.
+    """
+    __slots__ = ('position', 'food', 'numFood', 'problem', '_hash')
 
-        # append minimum distance to the total cost for the entire path
-        heuristicCost += d
+    def __init__(self, position, food, numFood, problem):
+        self.position = position
+        self.food = food
+        self.numFood = numFood
+        self.problem = problem
+        self._hash = hash((position, food))
 
-        # set the current node to the next corner
-        node = c
+    def __iter__(self):
+        return iter((self.position, self.problem.getFoodGrid(self)))
 
-        # mark the node as visited
-        visitedCorners.append(node)
+    def __getitem__(self, index):
+        return (self.position, self.problem.getFoodGrid(self))[index]
 
-    return heuristicCost
+    def __len__(self):
+        return 2
 
-class AStarCornersAgent(SearchAgent):
-    "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
-    def __init__(self):
-        self.searchFunction = lambda prob: search.aStarSearch(prob, cornersHeuristic)
-        self.searchType = CornersProblem
+    def __eq__(self, other):
+        if not isinstance(other, FoodSearchState): return False
+        return self.position == other.position and self.food == other.food
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return 'FoodSearchState(%s, %d dots)' % (str(self.position), self.numFood)
 
 class FoodSearchProblem:
     """
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
-      pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+    A search state in this problem is a FoodSearchState, holding Pacman's
+    position and the remaining food as an int bitmask. Use getFoodGrid or
+    getFoodList to turn the food of a state back into a grid or a list of
+    coordinates.
     """
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        food = BitGrid.fromGrid(startingGameState.getFood())
+        self.start = FoodSearchState(startingGameState.getPacmanPosition(), food.bits, food.count(), self)
         self.walls = startingGameState.getWalls()
+        self.neighbors = getNeighborTable(self.walls)
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -447,26 +640,35 @@ class FoodSearchProblem:
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state.numFood == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+        food, numFood = state.food, state.numFood
+        for position, direction, bit in self.neighbors[state.position]:
+            if food & bit:
+                nextState = FoodSearchState(position, food ^ bit, numFood - 1, self)
+            else:
+                nextState = FoodSearchState(position, food, numFood, self)
+            successors.append( ( nextState, direction, 1) )
         return successors
 
+    def getFoodGrid(self, state):
+        "Returns the remaining food of a state as a BitGrid."
+        grid = BitGrid(self.walls.width, self.walls.height)
+        grid.bits = state.food
+        return grid
+
+    def getFoodList(self, state):
+        "Returns the (x,y) coordinates of the remaining food of a state."
+        return self.getFoodGrid(state).asList()
+
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
         include an illegal move, return 999999"""
-        x,y= self.getStartState()[0]
+        x,y= self.getStartState().position
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -478,12 +680,20 @@ class FoodSearchProblem:
         return cost
 
 class AStarFoodSearchAgent(SearchAgent):
-    "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
-    def __init__(self):
-        self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
-        self.searchType = FoodSearchProblem
+    """
+    A SearchAgent for FoodSearchProblem using A* and your foodHeuristic.
+
+    fn can name another informed search, with its arguments passed along, e.g.
+    -a fn=memoryBoundedAStarSearch,maxNodes=200000 to bound memory use.
+    """
+    def __init__(self, fn='aStarSearch', **searchArgs):
+        if fn == 'aStarSearch' and not searchArgs:
+            self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
+            self.searchType = FoodSearchProblem
+        else:
+            SearchAgent.__init__(self, fn, 'FoodSearchProblem', 'foodHeuristic', **searchArgs)
 
-def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
+def foodHeuristic(state: FoodSearchState, problem: FoodSearchProblem):
     """
     Your heuristic for the FoodSearchProblem goes here.
 
@@ -496,9 +706,10 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a FoodSearchState with Pacman's position in state.position and
+    the remaining food as a bitmask in state.food. You can call
+    problem.getFoodGrid(state) to get a Grid (see game.py) of either True or
+    False, or problem.getFoodList(state) to get a list of food coordinates.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -511,60 +722,67 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
+    position = state.position
     "*** YOUR CODE HERE ***"
+    if state.numFood == 0:
+        return 0
 
-    # maximum dots to eat on a given path
-    heuristicCost = 0
+    # maze distances between cells of this layout, shared across calls
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = getMazeDistances(problem.walls)
+        problem.heuristicInfo['spanningTreeCosts'] = {}
+    mazeDistances = problem.heuristicInfo['mazeDistances']
+    spanningTreeCosts = problem.heuristicInfo['spanningTreeCosts']
 
     # list of food coordinates
-    foodList = foodGrid.asList()
-
-    # starting game state for calculating maze distance 
-    startingGameState = problem.startingGameState
-
-    while len(foodList) != 0:
-        # store distances to food item from a given state
-        distances = []
-
-        # loop through food list where the coordinates are true to find the maximum maze distance for a given state
-        for food in foodList:
+    foodList = problem.getFoodList(state)
 
-            # calculate maze distance between the pacman's position and where the food lies in the maze
-            d = mazeDistance(position, food, startingGameState)
+    # any path eating all the food walks to one dot first and then joins up the
+    # rest, which takes at least the weight of their minimum spanning tree
+    if state.food not in spanningTreeCosts:
+        spanningTreeCosts[state.food] = foodSpanningTreeCost(foodList, mazeDistances)
+    nearest = min(mazeDistanceOrInfinity(mazeDistances, position, food) for food in foodList)
+    return nearest + spanningTreeCosts[state.food]
 
-            # append calculated distance with its food position as a tuple
-            distances.append((d, food))
-
-        # get the max distance and food position
-        d, p = max(distances)
-        
-        # update if the calculated maze distance is greater than to what we have already maximized
-        if d > heuristicCost:
-            heuristicCost = d
-
-        # set the position to the next food position
-        position = p
-
-        # remove that food position since it's already visited
-        foodList.remove(p)
-
-    return heuristicCost
+def foodSpanningTreeCost(foodList, mazeDistances):
+    """
+    Returns the weight of a minimum spanning tree over the dots in foodList,
+    with maze distances as edge weights, built with Prim's algorithm. It is
+    infinite if some dot cannot be reached from the others.
+    """
+    for food in foodList:
+        mazeDistances.computeFrom(food)
+    # cheapest edge joining each dot not yet in the tree to the tree
+    joinCosts = {food: mazeDistanceOrInfinity(mazeDistances, foodList[0], food) for food in foodList[1:]}
+    treeCost = 0
+    while joinCosts:
+        nextFood = min(joinCosts, key=joinCosts.get)
+        treeCost += joinCosts.pop(nextFood)
+        for food in joinCosts:
+            d = mazeDistanceOrInfinity(mazeDistances, nextFood, food)
+            if d < joinCosts[food]:
+                joinCosts[food] = d
+    return treeCost
 
 class ClosestDotSearchAgent(SearchAgent):
-    "Search for all food using a sequence of searches"
+    """
+    Search for all food by always going to the closest dot.
+
+    Rather than a new search for every dot, one FoodDistanceField is kept up
+    to date as the dots are eaten, and each path to the closest dot just walks
+    down the field.
+    """
     def registerInitialState(self, state):
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+        field = FoodDistanceField(state.getWalls(), state.getFood())
+        position = state.getPacmanPosition()
+        while field.numFood > 0:
+            nextPathSegment = field.pathToClosest(position)
+            if nextPathSegment is None:
+                raise Exception('No path to the remaining food from %s!' % str(position))
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+            position = field.nearest[position]
+            field.removeFood(position)
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
@@ -577,12 +795,96 @@ class ClosestDotSearchAgent(SearchAgent):
         startPosition = gameState.getPacmanPosition()
         food = gameState.getFood()
         walls = gameState.getWalls()
-        problem = AnyFoodSearchProblem(gameState)
 
         "*** YOUR CODE HERE ***"
         
-        # run ucs on the problem to find the closest dot
-        return search.uniformCostSearch(problem)
+        # search the corridor graph of the maze, which only queues junctions
+        graph = getCorridorGraph(walls)
+        closest = graph.getClosest(startPosition, food)
+        if closest is None:
+            return None
+        return graph.getPath(startPosition, closest[1])
+
+class FoodDistanceField:
+    """
+    The maze distance from every open cell to its closest dot, together with
+    which dot that is. It is built with a single BFS started from all the dots
+    at once. When a dot is eaten, only the cells that were closest to it are
+    searched again, starting from the cells around them, so eating every dot
+    of a board costs little more than the first BFS.
+
+    distance[cell] and nearest[cell] are None when no dot can be reached.
+    """
+    def __init__(self, walls, food):
+        self.neighbors = getNeighborTable(walls)
+        self.distance = dict.fromkeys(self.neighbors)
+        self.nearest = dict.fromkeys(self.neighbors)
+        dots = food.asList()
+        self.numFood = len(dots)
+        for dot in dots:
+            self.distance[dot] = 0
+            self.nearest[dot] = dot
+
+        # one BFS from every dot, a level at a time
+        level = dots
+        while level:
+            nextLevel = []
+            for cell in level:
+                for neighbor, action, bit in self.neighbors[cell]:
+                    if self.distance[neighbor] is None:
+                        self.distance[neighbor] = self.distance[cell] + 1
+                        self.nearest[neighbor] = self.nearest[cell]
+                        nextLevel.append(neighbor)
+            level = nextLevel
+
+    def removeFood(self, dot):
+        "Updates the field after dot has been eaten."
+        self.numFood -= 1
+        # the cells closest to dot, which are connected through each other
+        region = [dot]
+        self.distance[dot] = self.nearest[dot] = None
+        for cell in region:
+            for neighbor, action, bit in self.neighbors[cell]:
+                if self.nearest[neighbor] == dot:
+                    self.distance[neighbor] = self.nearest[neighbor] = None
+                    region.append(neighbor)
+
+        # fill the region back in from the cells around it
+        heap = []
+        for cell in region:
+            for neighbor, action, bit in self.neighbors[cell]:
+                if self.distance[neighbor] is not None:
+                    heap.append((self.distance[neighbor] + 1, cell, self.nearest[neighbor]))
+        heapq.heapify(heap)
+        while heap:
+            distance, cell, nearest = heapq.heappop(heap)
+            if self.distance[cell] is not None:
+                continue
+            self.distance[cell] = distance
+            self.nearest[cell] = nearest
+            for neighbor, action, bit in self.neighbors[cell]:
+                if self.distance[neighbor] is None:
+                    heapq.heappush(heap, (distance + 1, neighbor, nearest))
+
+    def pathToClosest(self, position):
+        """
+        Returns the actions from position to its closest dot, nearest[position],
+        or None if there is no dot it can reach.
+        """
+        dot = self.nearest[position]
+        if dot is None:
+            return None
+        actions = []
+        while position != dot:
+            # some neighbor is one step closer to the same dot
+            for neighbor, action, bit in self.neighbors[position]:
+                if self.nearest[neighbor] == dot and self.distance[neighbor] == self.distance[position] - 1:
+                    break
+            else:
+                raise Exception('The food distance field is broken at %s' % str(position))
+            actions.append(action)
+            position = neighbor
+        return actions
 
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
@@ -608,6 +910,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         self.walls = gameState.getWalls()
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
+        self.neighbors = getNeighborTable(self.walls)
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
 
     def isGoalState(self, state: Tuple[int, int]):
@@ -631,11 +934,162 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    Distances are looked up in the MazeDistances table of the layout's walls,
+    so only the first query from each point pays for a BFS.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return getMazeDistances(walls).getDistance(point1, point2)
+
+class MazeDistances:
+    """
+    Maze distances between every pair of open cells of a walls Grid.
+
+    Open cells are numbered once and the distances are kept in one flat array
+    of unsigned 16-bit ints, a row per cell. A row is filled in by a single BFS
+    the first time a distance from (or to) its cell is asked for, so after the
+    first query from a cell every lookup from it is O(1).
+    """
+    UNREACHABLE = 0xFFFF
+
+    def __init__(self, walls):
+        self.walls = walls
+        table = getNeighborTable(walls)
+        self.cells = sorted(table)
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.cells))
+        # the neighbor table by cell number, which is all a BFS needs
+        self.neighbors = [[self.cellIndex[neighbor] for neighbor, action, bit in table[cell]] for cell in self.cells]
+        self.numCells = len(self.cells)
+        self.distances = array('H', [self.UNREACHABLE]) * (self.numCells * self.numCells)
+        self.computed = bytearray(self.numCells)
+
+    def _fillRow(self, source):
+        "Runs a BFS from cell number 'source' and stores its row of distances."
+        self._storeRow(source, bfsDistanceRow(self.neighbors, source))
+
+    def _storeRow(self, source, row):
+        start = source * self.numCells
+        self.distances[start:start + self.numCells] = row
+        self.computed[source] = 1
+
+    def computeAll(self):
+        "Fills in the whole table up front."
+        for source in range(self.numCells):
+            if not self.computed[source]:
+                self._fillRow(source)
+
+    def computeFromAll(self, positions, processes=None):
+        """
+        Fills in the distances from every cell in positions. The BFSs that are
+        still needed are shared out over a pool of 'processes' worker processes
+        (by default one per core), which all get the maze once when they start.
+        """
+        sources = sorted(set(self.cellIndex[pos] for pos in positions))
+        sources = [source for source in sources if not self.computed[source]]
+        if processes == 1 or len(sources) < 2:
+            for source in sources:
+                self._fillRow(source)
+            return
+        with concurrent.futures.ProcessPoolExecutor(processes, initializer=_initDistanceWorker,
+                                                    initargs=(self.neighbors,)) as pool:
+            numWorkers = processes or os.cpu_count() or 1
+            rows = pool.map(_distanceWorkerRow, sources, chunksize=max(1, len(sources) // (4 * numWorkers)))
+            for source, row in zip(sources, rows):
+                self._storeRow(source, row)
+
+    def computeFrom(self, pos):
+        """
+        Fills in the distances from pos, so that every later query from or to
+        pos is a lookup.
+        """
+        source = self.cellIndex[pos]
+        if not self.computed[source]:
+            self._fillRow(source)
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or None if there is no
+        path between them.
+        """
+        i, j = self.cellIndex[pos1], self.cellIndex[pos2]
+        if not self.computed[i]:
+            # distances are symmetric, so a row already filled for pos2 will do
+            if self.computed[j]:
+                i, j = j, i
+            else:
+                self._fillRow(i)
+        distance = self.distances[i * self.numCells + j]
+        if distance == self.UNREACHABLE:
+            return None
+        return distance
+
+def bfsDistanceRow(neighbors, source):
+    """
+    Runs a BFS over cells numbered 0..len(neighbors)-1, where neighbors[i]
+    lists the cells next to cell i. Returns the distances from source as an
+    array of unsigned 16-bit ints, with MazeDistances.UNREACHABLE for cells
+    that cannot be reached.
+    """
+    distances = array('H', [MazeDistances.UNREACHABLE]) * len(neighbors)
+    distances[source] = 0
+    frontier, depth = [source], 0
+    while frontier:
+        depth += 1
+        nextFrontier = []
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if distances[neighbor] == MazeDistances.UNREACHABLE:
+                    distances[neighbor] = depth
+                    nextFrontier.append(neighbor)
+        frontier = nextFrontier
+    return distances
+
+# the maze of a worker process of MazeDistances.computeFromAll
+_workerNeighbors = None
+
+def _initDistanceWorker(neighbors):
+    global _workerNeighbors
+    _workerNeighbors = neighbors
+
+def _distanceWorkerRow(source):
+    return bfsDistanceRow(_workerNeighbors, source)
+
+_mazeDistances = WallsCache(MazeDistances)
+
+def mazeDistances(sources, targets, gameState: pacman.GameState, processes=None):
+    """
+    Returns the maze distances from each point in sources to each point in
+    targets as a matrix, where matrix[i][j] is the distance from sources[i] to
+    targets[j], or None if there is no path.
+
+    The BFSs are run in a pool of 'processes' worker processes (by default one
+    per core), from whichever of sources or targets has fewer points. They fill
+    in the same table as mazeDistance, so later queries are lookups.
+    """
+    distances = getMazeDistances(gameState.getWalls())
+    if len(targets) < len(sources):
+        distances.computeFromAll(targets, processes)
+    else:
+        distances.computeFromAll(sources, processes)
+    return [[distances.getDistance(source, target) for target in targets] for source in sources]
+
+def getMazeDistances(walls) -> MazeDistances:
+    """
+    Returns the MazeDistances for a walls Grid. Tables are shared between all
+    the walls grids with the same contents, so repeated searches on one layout
+    only pay for the BFSs once.
+    """
+    return _mazeDistances.get(walls)
+
+def clearLayoutCaches():
+    """
+    Forgets the neighbor tables, maze distances and corridor graphs shared
+    between problems, so the next search on a layout builds its own.
+    """
+    _neighborTables.clear()
+    _mazeDistances.clear()
+    CORRIDOR_GRAPHS.clear()
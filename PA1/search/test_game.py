@@ -0,0 +1,80 @@
+# test_game.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of BitGrid against the list of lists backed Grid.
+
+  > python -m unittest test_game
+"""
+
+import random
+import unittest
+
+from game import BitGrid
+from game import Grid
+
+
+class BitGridTest(unittest.TestCase):
+
+    def assertSameGrid(self, bitGrid, grid):
+        self.assertEqual([[bitGrid[x][y] for y in range(grid.height)] for x in range(grid.width)], grid.data)
+        self.assertEqual(bitGrid.asList(), grid.asList())
+        self.assertEqual(bitGrid.asList(False), grid.asList(False))
+        self.assertEqual(bitGrid.count(), grid.count())
+        self.assertEqual(bitGrid.count(False), grid.count(False))
+        self.assertEqual(str(bitGrid), str(grid))
+        self.assertEqual(bitGrid.packBits(), grid.packBits())
+        self.assertEqual(hash(bitGrid), hash(grid))
+        self.assertTrue(bitGrid == grid and grid == bitGrid)
+
+    def testRandomEdits(self):
+        generator = random.Random(0)
+        for trial in range(50):
+            width, height = generator.randint(1, 12), generator.randint(1, 12)
+            initialValue = generator.random() < 0.5
+            grid, bitGrid = Grid(width, height, initialValue), BitGrid(width, height, initialValue)
+            for step in range(60):
+                x, y = generator.randrange(width), generator.randrange(height)
+                operation = generator.random()
+                if operation < 0.6:
+                    value = generator.random() < 0.5
+                    grid[x][y] = value
+                    bitGrid[x][y] = value
+                elif operation < 0.7:
+                    grid, bitGrid = grid.copy(), bitGrid.copy()
+                elif operation < 0.8:
+                    # an edit of the copy leaves the original alone
+                    before = grid.copy()
+                    copy, bitCopy = grid.copyColumn(x), bitGrid.copyColumn(x)
+                    copy[x][y] = bitCopy[x][y] = not copy[x][y]
+                    self.assertSameGrid(bitCopy, copy)
+                    self.assertSameGrid(bitGrid, before)
+                elif operation < 0.9:
+                    self.assertEqual(BitGrid.fromGrid(grid), bitGrid)
+                    self.assertEqual(bitGrid.toGrid().data, grid.data)
+                else:
+                    packed = grid.packBits()
+                    self.assertSameGrid(BitGrid(width, height, bitRepresentation=packed[2:]), grid)
+                self.assertSameGrid(bitGrid, grid)
+
+    def testIndexing(self):
+        bitGrid = BitGrid(3, 2)
+        bitGrid[1][1] = True
+        self.assertTrue(bitGrid[1][-1])
+        self.assertRaises(IndexError, lambda: bitGrid[1][2])
+        self.assertNotEqual(bitGrid, BitGrid(3, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
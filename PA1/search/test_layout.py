@@ -0,0 +1,135 @@
+# test_layout.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of the CorridorGraph of every layout against a plain BFS over cells,
+and of the WallsCache that shares it between layouts.
+
+  > python -m unittest test_layout
+"""
+
+import gc
+import os
+import random
+import unittest
+
+import layout
+from game import Actions
+from game import Grid
+
+
+def bfsDistances(walls, source):
+    "The maze distance from source to every open cell it can reach."
+    distances = {source: 0}
+    level = [source]
+    while level:
+        nextLevel = []
+        for x, y in level:
+            for cell in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+                if not walls[cell[0]][cell[1]] and cell not in distances:
+                    distances[cell] = distances[(x, y)] + 1
+                    nextLevel.append(cell)
+        level = nextLevel
+    return distances
+
+
+def corridorLayouts():
+    "Every bundled layout, plus a lone loop and two rooms that are not joined."
+    layouts = [(name, layout.getLayout(name[:-4])) for name in sorted(os.listdir('layouts'))]
+    layouts.append(('loop', layout.Layout(['%%%%%%',
+                                           '%P   %',
+                                           '% %% %',
+                                           '%    %',
+                                           '%%%%%%'])))
+    layouts.append(('rooms', layout.Layout(['%%%%%%%',
+                                            '%P %  %',
+                                            '%  % .%',
+                                            '%%%%%%%'])))
+    return layouts
+
+
+class CorridorGraphTest(unittest.TestCase):
+
+    def testAgainstBFS(self):
+        generator = random.Random(0)
+        for name, gameLayout in corridorLayouts():
+            walls = gameLayout.walls
+            graph = layout.CorridorGraph(walls.copy())
+            cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+            for source in generator.sample(cells, min(10, len(cells))):
+                distances = bfsDistances(walls, source)
+                targets = Grid(walls.width, walls.height)
+                for x, y in generator.sample(cells, min(3, len(cells))):
+                    targets[x][y] = True
+                for target in generator.sample(cells, min(10, len(cells))):
+                    expected = distances.get(target)
+                    self.assertEqual(graph.getDistance(source, target), expected, (name, source, target))
+                    path = graph.getPath(source, target)
+                    if expected is None:
+                        self.assertIsNone(path)
+                        continue
+                    self.assertEqual(len(path), expected, (name, source, target))
+                    x, y = source
+                    for action in path:
+                        dx, dy = Actions.directionToVector(action)
+                        x, y = int(x + dx), int(y + dy)
+                        self.assertFalse(walls[x][y])
+                    self.assertEqual((x, y), target)
+
+                reachable = [distances[cell] for cell in targets.asList() if cell in distances]
+                closest = graph.getClosest(source, targets)
+                if not reachable:
+                    self.assertIsNone(closest)
+                else:
+                    distance, cell = closest
+                    self.assertEqual(distance, min(reachable), (name, source))
+                    self.assertTrue(targets[cell[0]][cell[1]])
+                    self.assertEqual(distances[cell], distance)
+
+    def testShared(self):
+        gameLayout = layout.getLayout('mediumClassic')
+        graph = gameLayout.getCorridorGraph()
+        self.assertIs(layout.getLayout('mediumClassic').getCorridorGraph(), graph)
+        self.assertIs(gameLayout.deepCopy().getCorridorGraph(), graph)
+
+
+class WallsCacheTest(unittest.TestCase):
+
+    def testSharedByContents(self):
+        built = []
+        cache = layout.WallsCache(lambda walls: built.append(walls) or len(built))
+        walls = layout.getLayout('mediumClassic').walls
+        self.assertEqual(cache.get(walls), 1)
+        self.assertEqual(cache.get(walls.copy()), 1)
+        self.assertEqual(cache.get(layout.getLayout('smallClassic').walls), 2)
+        self.assertEqual(len(built), 2)
+        # build gets a copy, so changing the walls afterwards does not change it
+        self.assertIsNot(built[0], walls)
+        self.assertEqual(built[0], walls)
+
+    def testThrowawayWallsAreDropped(self):
+        cache = layout.WallsCache(lambda walls: object())
+        gameLayout = layout.getLayout('mediumClassic')
+        value = cache.get(gameLayout.walls)
+        for i in range(50):
+            self.assertIs(cache.get(gameLayout.deepCopy().walls), value)
+        gc.collect()
+        self.assertEqual(len(cache.byId), 1)
+        self.assertEqual(len(cache.byWalls), 1)
+        cache.clear()
+        self.assertEqual(len(cache.byId), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
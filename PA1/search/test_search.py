@@ -0,0 +1,291 @@
+# test_search.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of the search functions that the autograder does not cover, against
+uniformCostSearch on small random graphs and on the maze layouts.
+
+  > python -m unittest test_search
+"""
+
+import random
+import unittest
+
+import eightpuzzle
+import layout
+import pacman
+import search
+import searchAgents
+import util
+
+
+class RandomGraphProblem(search.SearchProblem):
+    "A random directed graph with integer step costs and a single goal."
+
+    def __init__(self, seed, unitCosts=False):
+        generator = random.Random(seed)
+        self.numStates = generator.randint(3, 9)
+        self.successors = dict((state, []) for state in range(self.numStates))
+        for state in range(self.numStates):
+            for other in range(self.numStates):
+                if state != other and generator.random() < 0.35:
+                    cost = 1 if unitCosts else generator.randint(1, 4)
+                    self.successors[state].append((other, '%d>%d' % (state, other), cost))
+        self.start = 0
+        self.goal = generator.randint(1, self.numStates - 1)
+
+    def getStartState(self):
+        return self.start
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getGoalState(self):
+        return self.goal
+
+    def getSuccessors(self, state):
+        return list(self.successors[state])
+
+    def getPredecessors(self, state):
+        return [(previous, action, cost) for previous in self.successors
+                for successor, action, cost in self.successors[previous] if successor == state]
+
+    def getCostOfActions(self, actions):
+        state, total = self.start, 0
+        for action in actions:
+            state, cost = [(successor, cost) for successor, a, cost in self.successors[state] if a == action][0]
+            total += cost
+        return total
+
+
+def randomProblems(count, unitCosts=False, solvableOnly=False):
+    """
+    Yields (problem, path found by ucs) for count random graphs, the path
+    being None if there is none. With solvableOnly, graphs with no path are
+    skipped and count graphs with one are yielded.
+    """
+    seed = 0
+    while count > 0:
+        problem = RandomGraphProblem(seed, unitCosts)
+        seed += 1
+        path = search.ucs(problem)
+        if path is not None or not solvableOnly:
+            count -= 1
+            yield problem, path
+
+
+def halvedDistanceHeuristic(problem):
+    """
+    A consistent heuristic for a RandomGraphProblem: half the true cost to the
+    goal, rounded down, and 0 where the goal cannot be reached.
+    """
+    distances = {problem.goal: 0}
+    frontier = [problem.goal]
+    while frontier:
+        state = frontier.pop()
+        for previous, action, cost in problem.getPredecessors(state):
+            if previous not in distances or distances[state] + cost < distances[previous]:
+                distances[previous] = distances[state] + cost
+                frontier.append(previous)
+    return lambda state, problem=None: distances.get(state, 0) // 2
+
+
+MAZES = ['tinyMaze', 'smallMaze', 'mediumMaze', 'bigMaze', 'openMaze', 'contoursMaze', 'trickySearch']
+
+
+def mazeProblems(count, costFn=lambda pos: 1):
+    "Yields count PositionSearchProblems between random open cells of each maze."
+    for seed, layoutName in enumerate(MAZES):
+        gameState = pacman.GameState()
+        gameState.initialize(layout.getLayout(layoutName), 0)
+        walls = gameState.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        generator = random.Random(seed)
+        for i in range(count):
+            start, goal = generator.sample(cells, 2)
+            yield searchAgents.PositionSearchProblem(gameState, costFn, goal, start, warn=False, visualize=False)
+
+
+def columnCost(pos):
+    "Step costs that differ from column to column."
+    return 1 + pos[0] % 3
+
+
+def pathCost(problem, path):
+    "The cost of a path, or None for no path."
+    if path is None:
+        return None
+    return problem.getCostOfActions(path)
+
+
+class MemoryBoundedAStarTest(unittest.TestCase):
+
+    def testOptimalAtTheMemoryBound(self):
+        # an optimal path of n actions needs n + 1 nodes in memory
+        for problem, path in randomProblems(500, solvableOnly=True):
+            cost = problem.getCostOfActions(path)
+            for maxNodes in [len(path) + 1, len(path) + 2, 100]:
+                found = search.smastar(problem, maxNodes=maxNodes)
+                self.assertIsNotNone(found, (problem.successors, maxNodes))
+                self.assertEqual(problem.getCostOfActions(found), cost, (problem.successors, maxNodes))
+
+    def testWithAHeuristic(self):
+        for problem, path in randomProblems(500, solvableOnly=True):
+            heuristic = halvedDistanceHeuristic(problem)
+            for maxNodes in [len(path) + 1, 100]:
+                found = search.smastar(problem, heuristic, maxNodes=maxNodes)
+                self.assertEqual(pathCost(problem, found), pathCost(problem, path), (problem.successors, maxNodes))
+
+
+class IterativeDeepeningAStarTest(unittest.TestCase):
+
+    def testOptimal(self):
+        for problem, path in randomProblems(500):
+            cost = pathCost(problem, path)
+            self.assertEqual(pathCost(problem, search.idastar(problem)), cost, problem.successors)
+            found = search.idastar(problem, halvedDistanceHeuristic(problem))
+            self.assertEqual(pathCost(problem, found), cost, problem.successors)
+
+
+class WeightedAStarTest(unittest.TestCase):
+
+    def testWithinTheWeight(self):
+        for problem, path in randomProblems(500, solvableOnly=True):
+            cost = pathCost(problem, path)
+            heuristic = halvedDistanceHeuristic(problem)
+            for weight in [1, 1.5, 3]:
+                found = search.wastar(problem, heuristic, weight=weight)
+                self.assertTrue(pathCost(problem, found) <= weight * cost, (problem.successors, weight))
+
+    def testAnytimeRepairing(self):
+        for problem, path in randomProblems(500):
+            cost = pathCost(problem, path)
+            heuristic = halvedDistanceHeuristic(problem)
+            found = search.arastar(problem, heuristic, weight=4, decrement=1, deadline=60)
+            self.assertEqual(pathCost(problem, found), cost, problem.successors)
+            if cost is not None:
+                self.assertEqual(problem.anytimeSolutions[-1][0], 1)
+                for weight, stepCost, seconds in problem.anytimeSolutions:
+                    self.assertTrue(stepCost <= weight * cost, (problem.successors, weight))
+
+
+class IndexedPriorityQueueTest(unittest.TestCase):
+
+    def testAgainstADict(self):
+        # random pushes, updates, removes and pops, checked against a dict of priorities
+        generator = random.Random(0)
+        queue = util.IndexedPriorityQueue()
+        priorities = {}
+        for step in range(20000):
+            item = generator.randint(0, 50)
+            priority = generator.randint(0, 100)
+            operation = generator.random()
+            if operation < 0.3:
+                queue.push(item, priority)
+                priorities[item] = priority
+            elif operation < 0.6:
+                queue.update(item, priority)
+                if item not in priorities or priority < priorities[item]:
+                    priorities[item] = priority
+            elif operation < 0.8:
+                queue.remove(item)
+                priorities.pop(item, None)
+            elif priorities:
+                lowest = min(priorities.values())
+                self.assertEqual(queue.getMinPriority(), lowest)
+                self.assertEqual(priorities[queue.peek()], lowest)
+                popped = queue.pop()
+                self.assertEqual(priorities.pop(popped), lowest)
+            self.assertEqual(len(queue), len(priorities))
+            self.assertEqual(queue.isEmpty(), not priorities)
+        while priorities:
+            lowest = min(priorities.values())
+            self.assertEqual(priorities.pop(queue.pop()), lowest)
+        self.assertRaises(IndexError, queue.pop)
+
+    def testKey(self):
+        queue = util.IndexedPriorityQueue(key=lambda item: item[0])
+        queue.push(('a', 1), 5)
+        queue.push(('b', 1), 3)
+        # the same key with a worse priority leaves the entry alone
+        queue.update(('a', 2), 7)
+        queue.update(('a', 3), 1)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.pop(), ('a', 3))
+        queue.remove(('b', None))
+        self.assertTrue(queue.isEmpty())
+
+
+class BidirectionalSearchTest(unittest.TestCase):
+
+    def testBreadthFirst(self):
+        for problem, path in randomProblems(500, unitCosts=True):
+            found = search.bdbfs(problem)
+            self.assertEqual(pathCost(problem, found), pathCost(problem, path), problem.successors)
+
+    def testUniformCost(self):
+        for problem, path in randomProblems(500):
+            found = search.bducs(problem)
+            self.assertEqual(pathCost(problem, found), pathCost(problem, path), problem.successors)
+
+    def testMazes(self):
+        for problem in mazeProblems(20):
+            cost = pathCost(problem, search.ucs(problem))
+            self.assertEqual(pathCost(problem, search.bdbfs(problem)), cost, (problem.startState, problem.goal))
+            self.assertEqual(pathCost(problem, search.bducs(problem)), cost, (problem.startState, problem.goal))
+        for problem in mazeProblems(20, columnCost):
+            cost = pathCost(problem, search.ucs(problem))
+            self.assertEqual(pathCost(problem, search.bducs(problem)), cost, (problem.startState, problem.goal))
+
+
+class JumpPointSearchTest(unittest.TestCase):
+
+    def testMazes(self):
+        for costFn in [lambda pos: 1, columnCost]:
+            for problem in mazeProblems(20, costFn):
+                cost = pathCost(problem, search.ucs(problem))
+                self.assertEqual(pathCost(problem, search.jps(problem)), cost, (problem.startState, problem.goal))
+                found = search.jps(problem, searchAgents.manhattanHeuristic)
+                self.assertEqual(pathCost(problem, found), cost, (problem.startState, problem.goal))
+
+
+class EightPuzzleTest(unittest.TestCase):
+
+    def testHeuristicsAreOptimal(self):
+        random.seed(0)
+        for i in range(30):
+            puzzle = eightpuzzle.createRandomEightPuzzle(40)
+            cost = len(search.bfs(eightpuzzle.EightPuzzleSearchProblem(puzzle)))
+            for name, heuristic in sorted(eightpuzzle.HEURISTICS.items()):
+                path = search.astar(eightpuzzle.EightPuzzleSearchProblem(puzzle), heuristic)
+                self.assertEqual(len(path), cost, (name, puzzle.getNumbers()))
+                self.assertTrue(heuristic(puzzle) <= cost, (name, puzzle.getNumbers()))
+
+    def testBatch(self):
+        puzzles = eightpuzzle.randomPuzzles(range(8), 40, 3)
+        serial = eightpuzzle.solvePuzzles(puzzles, processes=1)
+        pooled = eightpuzzle.solvePuzzles(puzzles, processes=2)
+        self.assertEqual([result[:2] for result in pooled], [result[:2] for result in serial])
+
+    def testCells(self):
+        puzzle = eightpuzzle.EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(puzzle.cells, [[1, 0, 2], [3, 4, 5], [6, 7, 8]])
+        self.assertEqual(puzzle.blankLocation, (0, 1))
+        moved = puzzle.result('down')
+        self.assertEqual(moved.cells, [[1, 4, 2], [3, 0, 5], [6, 7, 8]])
+        self.assertEqual(moved.blankLocation, (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
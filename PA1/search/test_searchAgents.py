@@ -0,0 +1,239 @@
+# test_searchAgents.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of the search problems and the tables behind the heuristics in
+searchAgents.py against plain reference versions.
+
+  > python -m unittest test_searchAgents
+"""
+
+import os
+import random
+import unittest
+
+import layout
+import pacman
+import search
+import searchAgents
+from game import Actions
+from game import Directions
+
+
+def makeGameState(layoutText):
+    gameState = pacman.GameState()
+    gameState.initialize(layout.Layout(layoutText), 0)
+    return gameState
+
+
+class TupleFoodSearchProblem(search.SearchProblem):
+    "The FoodSearchProblem as it was, with (position, foodGrid) tuples as states."
+
+    def __init__(self, gameState):
+        self.start = (gameState.getPacmanPosition(), gameState.getFood())
+        self.walls = gameState.getWalls()
+
+    def getStartState(self):
+        return self.start
+
+    def isGoalState(self, state):
+        return state[1].count() == 0
+
+    def getSuccessors(self, state):
+        successors = []
+        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            x, y = state[0]
+            dx, dy = Actions.directionToVector(direction)
+            nextx, nexty = int(x + dx), int(y + dy)
+            if not self.walls[nextx][nexty]:
+                nextFood = state[1].copy()
+                nextFood[nextx][nexty] = False
+                successors.append((((nextx, nexty), nextFood), direction, 1))
+        return successors
+
+
+class FoodSearchStateTest(unittest.TestCase):
+
+    def assertSameState(self, state, expected):
+        position, foodGrid = state
+        self.assertEqual(position, expected[0])
+        self.assertEqual(foodGrid, expected[1])
+        self.assertEqual(state[1], expected[1])
+        self.assertEqual(state.numFood, expected[1].count())
+
+    def testSuccessorsMatchTuples(self):
+        # walk both state spaces breadth first, side by side
+        for layoutName in ['tinySearch', 'smallSearch', 'trickySearch']:
+            gameState = pacman.GameState()
+            gameState.initialize(layout.getLayout(layoutName), 0)
+            problem = searchAgents.FoodSearchProblem(gameState)
+            reference = TupleFoodSearchProblem(gameState)
+            frontier = [(problem.getStartState(), reference.getStartState())]
+            seen = set([problem.getStartState()])
+            while frontier and len(seen) < 3000:
+                state, expected = frontier.pop(0)
+                self.assertSameState(state, expected)
+                self.assertEqual(problem.isGoalState(state), reference.isGoalState(expected))
+                successors = problem.getSuccessors(state)
+                expectedSuccessors = reference.getSuccessors(expected)
+                self.assertEqual([action for successor, action, cost in successors],
+                                 [action for successor, action, cost in expectedSuccessors])
+                for (successor, action, cost), (expectedSuccessor, a, c) in zip(successors, expectedSuccessors):
+                    self.assertEqual(cost, c)
+                    if successor not in seen:
+                        seen.add(successor)
+                        frontier.append((successor, expectedSuccessor))
+                    # equal states hash alike
+                    self.assertEqual(hash(successor), hash(searchAgents.FoodSearchState(
+                        successor.position, successor.food, successor.numFood, problem)))
+
+    def testOptimalCost(self):
+        gameState = pacman.GameState()
+        gameState.initialize(layout.getLayout('tinySearch'), 0)
+        path = search.ucs(TupleFoodSearchProblem(gameState))
+        self.assertEqual(len(search.ucs(searchAgents.FoodSearchProblem(gameState))), len(path))
+
+
+class NeighborTableTest(unittest.TestCase):
+
+    def testAgainstWalls(self):
+        for name in sorted(os.listdir('layouts')):
+            gameState = pacman.GameState()
+            gameState.initialize(layout.getLayout(name[:-4]), 0)
+            walls = gameState.getWalls()
+            table = searchAgents.getNeighborTable(walls)
+            self.assertIs(searchAgents.getNeighborTable(walls.copy()), table)
+            problem = searchAgents.PositionSearchProblem(gameState, lambda pos: pos[0] + 1, warn=False, visualize=False)
+            for x in range(walls.width):
+                for y in range(walls.height):
+                    if walls[x][y]:
+                        self.assertNotIn((x, y), table)
+                        continue
+                    # the successors as PositionSearchProblem used to work them out
+                    expected = []
+                    for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                        dx, dy = Actions.directionToVector(action)
+                        nextx, nexty = int(x + dx), int(y + dy)
+                        if not walls[nextx][nexty]:
+                            expected.append(((nextx, nexty), action, nextx + 1))
+                    self.assertEqual(problem.getSuccessors((x, y)), expected, (name, x, y))
+                    self.assertEqual([bit for cell, action, bit in table[(x, y)]],
+                                     [1 << (cell[0] * walls.height + cell[1]) for cell, action, cost in expected])
+            # the display bookkeeping is kept up
+            self.assertEqual(problem._expanded, walls.count(False))
+            self.assertEqual(len(problem._visitedlist), walls.count(False))
+
+
+class FoodHeuristicTest(unittest.TestCase):
+
+    def testUnreachableDot(self):
+        # the dot on the right is walled in
+        gameState = makeGameState(['%%%%%%%%',
+                                   '%P . %.%',
+                                   '%%%%%%%%'])
+        problem = searchAgents.FoodSearchProblem(gameState)
+        start = problem.getStartState()
+        self.assertEqual(searchAgents.foodHeuristic(start, problem), float('inf'))
+        self.assertIsNone(search.astar(problem, searchAgents.foodHeuristic))
+
+    def testReachableDots(self):
+        gameState = makeGameState(['%%%%%%%%',
+                                   '%P . % %',
+                                   '%  %  .%',
+                                   '%%%%%%%%'])
+        problem = searchAgents.FoodSearchProblem(gameState)
+        # 2 moves to the nearer dot, then 4 to the other
+        self.assertEqual(searchAgents.foodHeuristic(problem.getStartState(), problem), 6)
+        self.assertEqual(len(search.astar(problem, searchAgents.foodHeuristic)), 6)
+
+
+def multiSourceDistances(walls, dots):
+    "A plain BFS from every dot at once: the distance from each open cell to its closest dot."
+    distances = dict((dot, 0) for dot in dots)
+    level = list(dots)
+    while level:
+        nextLevel = []
+        for x, y in level:
+            for cell in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+                if not walls[cell[0]][cell[1]] and cell not in distances:
+                    distances[cell] = distances[(x, y)] + 1
+                    nextLevel.append(cell)
+        level = nextLevel
+    return distances
+
+
+class FoodDistanceFieldTest(unittest.TestCase):
+
+    def assertMatchesBFS(self, field, walls, dots, layoutName):
+        expected = multiSourceDistances(walls, dots)
+        for cell in field.distance:
+            self.assertEqual(field.distance[cell], expected.get(cell), (layoutName, cell))
+            if cell not in expected:
+                self.assertIsNone(field.nearest[cell])
+                self.assertIsNone(field.pathToClosest(cell))
+                continue
+            # the nearest dot is one of the remaining dots at that distance
+            self.assertIn(field.nearest[cell], dots)
+            path = field.pathToClosest(cell)
+            self.assertEqual(len(path), expected[cell])
+            x, y = cell
+            for action in path:
+                dx, dy = Actions.directionToVector(action)
+                x, y = int(x + dx), int(y + dy)
+                self.assertFalse(walls[x][y])
+            self.assertEqual((x, y), field.nearest[cell])
+
+    def testEatingDots(self):
+        generator = random.Random(0)
+        for layoutName in ['tinySearch', 'smallSearch', 'trickySearch', 'mediumSearch', 'bigSearch']:
+            gameState = pacman.GameState()
+            gameState.initialize(layout.getLayout(layoutName), 0)
+            walls, food = gameState.getWalls(), gameState.getFood()
+            dots = set(food.asList())
+            field = searchAgents.FoodDistanceField(walls, food)
+            self.assertMatchesBFS(field, walls, dots, layoutName)
+            while dots:
+                dot = generator.choice(sorted(dots))
+                dots.remove(dot)
+                field.removeFood(dot)
+                self.assertEqual(field.numFood, len(dots))
+                self.assertMatchesBFS(field, walls, dots, layoutName)
+
+
+class MazeDistancesTest(unittest.TestCase):
+
+    def testPooledMatchesSerial(self):
+        generator = random.Random(0)
+        for layoutName in ['mediumMaze', 'bigMaze', 'mediumClassic']:
+            gameState = pacman.GameState()
+            gameState.initialize(layout.getLayout(layoutName), 0)
+            walls = gameState.getWalls()
+            cells = sorted(searchAgents.getNeighborTable(walls))
+            sources, targets = generator.sample(cells, 6), generator.sample(cells, 8)
+            matrices = []
+            for processes in [1, 2]:
+                # each run starts from an empty table
+                searchAgents.clearLayoutCaches()
+                matrices.append(searchAgents.mazeDistances(sources, targets, gameState, processes))
+                matrices.append(searchAgents.mazeDistances(targets, sources, gameState, processes))
+            for source, row in zip(sources, matrices[0]):
+                expected = multiSourceDistances(walls, [source])
+                self.assertEqual(row, [expected.get(target) for target in targets])
+            self.assertEqual(matrices[2], matrices[0])
+            self.assertEqual(matrices[3], matrices[1])
+            self.assertEqual(matrices[1], [list(column) for column in zip(*matrices[0])])
+
+
+if __name__ == '__main__':
+    unittest.main()
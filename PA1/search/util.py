@@ -147,6 +147,9 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
@@ -167,6 +170,9 @@ class Queue:
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
@@ -190,6 +196,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -221,6 +230,80 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class IndexedPriorityQueue:
+    """
+      A priority queue with the same push/pop/update/isEmpty interface as
+      PriorityQueue, but with an O(log n) update. An entry finder maps each
+      item's key to its heap entry; when an item gets a better priority its
+      old entry is marked as removed and a new one is pushed (lazy deletion),
+      so the heap is never scanned or rebuilt.
+
+      key: an optional function from an item to the hashable value that
+      identifies it in the queue. By default the item itself is the key.
+    """
+    REMOVED = object()
+
+    def  __init__(self, key=None):
+        self.heap = []
+        self.entryFinder = {}
+        self.count = 0
+        self.key = key if key is not None else (lambda item: item)
+
+    def push(self, item, priority):
+        "Adds 'item', replacing any entry with the same key already queued."
+        k = self.key(item)
+        if k in self.entryFinder:
+            self.entryFinder.pop(k)[-1] = self.REMOVED
+        entry = [priority, self.count, item]
+        self.entryFinder[k] = entry
+        heapq.heappush(self.heap, entry)
+        self.count += 1
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority."
+        while self.heap:
+            (_, _, item) = heapq.heappop(self.heap)
+            if item is not self.REMOVED:
+                del self.entryFinder[self.key(item)]
+                return item
+        raise IndexError('pop from an empty priority queue')
+
+    def isEmpty(self):
+        return len(self.entryFinder) == 0
+
+    def peek(self):
+        "Returns the item with the lowest priority without removing it."
+        while self.heap[0][-1] is self.REMOVED:
+            heapq.heappop(self.heap)
+        return self.heap[0][-1]
+
+    def getMinPriority(self):
+        "Returns the lowest priority in the queue without removing its item."
+        while self.heap[0][-1] is self.REMOVED:
+            heapq.heappop(self.heap)
+        return self.heap[0][0]
+
+    def remove(self, item):
+        "Removes 'item' from the queue if it is there."
+        entry = self.entryFinder.pop(self.key(item), None)
+        if entry is not None:
+            entry[-1] = self.REMOVED
+            # drop removed entries once they outnumber the live ones
+            if len(self.heap) > 2 * len(self.entryFinder) + 64:
+                self.heap = [e for e in self.heap if e[-1] is not self.REMOVED]
+                heapq.heapify(self.heap)
+
+    def update(self, item, priority):
+        # If item already in priority queue with higher priority, update its priority.
+        # If item already in priority queue with equal or lower priority, do nothing.
+        # If item not in priority queue, do the same thing as self.push.
+        entry = self.entryFinder.get(self.key(item))
+        if entry is None or priority < entry[0]:
+            self.push(item, priority)
+
+    def __len__(self):
+        return len(self.entryFinder)
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
@@ -0,0 +1,357 @@
+# gameLog.py
+# ----------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+An append-only binary log of recorded games.
+
+The log is a header followed by records, each a one byte tag, a 4 byte
+length and a payload, so a reader can stream through it or skip records:
+
+  L  a layout: its 8 byte key and its text. Written once per log, before the
+     first game played on it.
+  G  a game: the key of its layout, the number of agents, the final score and
+     result, one byte per move (agent index * 8 + direction) and a snapshot
+     of the state every snapshotInterval moves: the score, the win and lose
+     flags, the food as a bitmask, the capsules, and each agent's position,
+     direction and scared timer.
+
+A snapshot lets getState jump to any move by replaying at most
+snapshotInterval moves instead of the whole game.
+
+  > python pacman.py -p ExpectimaxAgent -q -n 100 -r --recordFile games.log
+  > python pacman.py --replay games.log --replayGame 42 --replayFrom 300
+"""
+
+import hashlib
+import os
+import struct
+
+import layout
+from game import Configuration
+from game import Directions
+
+MAGIC = b'PACLOG2\n'
+DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+DIRECTION_CODES = dict((direction, i) for i, direction in enumerate(DIRECTIONS))
+
+RECORD = struct.Struct('<cI')
+GAME = struct.Struct('<8sBd?II')
+SNAPSHOT = struct.Struct('<II')
+SNAPSHOT_HEADER = struct.Struct('<d??HH')
+CAPSULE = struct.Struct('<HH')
+AGENT = struct.Struct('<ddBH')
+
+
+def getLayoutKey(gameLayout):
+    "Identifies a layout by its text."
+    text = '\n'.join(gameLayout.layoutText).encode()
+    return hashlib.sha1(text).digest()[:8]
+
+
+def encodeMoves(moves):
+    return bytes(agentIndex * 8 + DIRECTION_CODES[action] for agentIndex, action in moves)
+
+
+def decodeMoves(data):
+    return [(byte >> 3, DIRECTIONS[byte & 7]) for byte in data]
+
+
+def encodeSnapshot(state):
+    "Packs the parts of a state that change during a game."
+    data = state.data
+    food = 0
+    for x, y in data.food.asList():
+        food |= 1 << (x * data.food.height + y)
+    foodBytes = food.to_bytes((food.bit_length() + 7) // 8, 'little')
+    parts = [SNAPSHOT_HEADER.pack(data.score, data._win, data._lose, len(data.capsules), len(foodBytes)),
+             foodBytes]
+    for x, y in data.capsules:
+        parts.append(CAPSULE.pack(x, y))
+    for agentState in data.agentStates:
+        x, y = agentState.configuration.pos
+        parts.append(AGENT.pack(x, y, DIRECTION_CODES[agentState.configuration.direction],
+                                agentState.scaredTimer))
+    return b''.join(parts)
+
+
+def decodeSnapshot(data, numAgents):
+    "Returns the score, win, lose, food bitmask, capsules and agents of a snapshot."
+    score, win, lose, numCapsules, foodLength = SNAPSHOT_HEADER.unpack_from(data)
+    offset = SNAPSHOT_HEADER.size
+    food = int.from_bytes(data[offset:offset + foodLength], 'little')
+    offset += foodLength
+    capsules = []
+    for i in range(numCapsules):
+        capsules.append(CAPSULE.unpack_from(data, offset))
+        offset += CAPSULE.size
+    agents = []
+    for i in range(numAgents):
+        x, y, direction, scaredTimer = AGENT.unpack_from(data, offset)
+        offset += AGENT.size
+        # the cells of agents that are not between two cells are ints
+        if x == int(x) and y == int(y):
+            x, y = int(x), int(y)
+        agents.append(((x, y), DIRECTIONS[direction], scaredTimer))
+    return score, win, lose, food, capsules, agents
+
+
+def restoreSnapshot(gameLayout, numAgents, snapshot):
+    """
+    Builds the state of a snapshot from the start of its game, so the food
+    and capsule hashes are kept up to date by the usual removeFood and
+    removeCapsule.
+    """
+    from pacman import GameState
+    score, win, lose, food, capsules, agents = snapshot
+    state = GameState()
+    state.initialize(gameLayout, numAgents - 1)
+    data = state.data
+    for x, y in data.food.asList():
+        if not (food >> (x * data.food.height + y)) & 1:
+            data.removeFood(x, y)
+    for position in list(data.capsules):
+        if position not in capsules:
+            data.removeCapsule(position)
+    for index, (pos, direction, scaredTimer) in enumerate(agents):
+        agentState = data.copyAgentState(index)
+        agentState.configuration = Configuration(pos, direction)
+        agentState.scaredTimer = scaredTimer
+    data.score = score
+    data._win = win
+    data._lose = lose
+    return state
+
+
+class GameRecord:
+    """
+    One game of a log. The moves are decoded and the states rebuilt only
+    when they are asked for.
+    """
+
+    def __init__(self, layout, numAgents, score, win, moveData, snapshots):
+        self.layout = layout
+        self.numAgents = numAgents
+        self.score = score
+        self.win = win
+        self.moveData = moveData
+        # (move index, encoded snapshot), in the order of the moves
+        self.snapshots = snapshots
+
+    def getNumMoves(self):
+        return len(self.moveData)
+
+    def getActions(self):
+        "The (agentIndex, action) moves of the game, like Game.moveHistory."
+        return decodeMoves(self.moveData)
+
+    def getState(self, moveIndex=0):
+        """
+        Returns the state after the first moveIndex moves, starting from the
+        last snapshot at or before that move.
+        """
+        if not 0 <= moveIndex <= len(self.moveData):
+            raise Exception('Move %d is not in a game of %d moves' % (moveIndex, len(self.moveData)))
+        start, snapshot = 0, None
+        for snapshotIndex, data in self.snapshots:
+            if snapshotIndex > moveIndex:
+                break
+            start, snapshot = snapshotIndex, data
+        if snapshot is None:
+            from pacman import GameState
+            state = GameState()
+            state.initialize(self.layout, self.numAgents - 1)
+        else:
+            state = restoreSnapshot(self.layout, self.numAgents, decodeSnapshot(snapshot, self.numAgents))
+        for agentIndex, action in decodeMoves(self.moveData[start:moveIndex]):
+            state = state.generateSuccessor(agentIndex, action)
+        return state
+
+
+class GameLogWriter:
+    """
+    Appends games to a log, creating it if needed. The layouts already in an
+    existing log are not written again. A game passed to watchGame before it
+    is played has its snapshots taken from its live states; any other game
+    is replayed from its moves for them.
+    """
+
+    def __init__(self, path, snapshotInterval=100):
+        self.snapshotInterval = snapshotInterval
+        self.layoutKeys = set()
+        # the snapshots taken so far of each game being watched
+        self.watched = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = GameLogReader(path)
+            for key in reader.readLayouts():
+                self.layoutKeys.add(key)
+            reader.close()
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+
+    def writeRecord(self, tag, payload):
+        self.file.write(RECORD.pack(tag, len(payload)))
+        self.file.write(payload)
+
+    def watchGame(self, game):
+        """
+        Snapshots the states of a Game as it is played, before Game.run, so
+        that writeGame does not have to play it again.
+        """
+        snapshots = []
+        def observe(numMoves, state):
+            if numMoves % self.snapshotInterval == 0:
+                snapshots.append((numMoves, encodeSnapshot(state)))
+        game.moveObservers.append(observe)
+        self.watched[game] = snapshots
+
+    def replaySnapshots(self, game):
+        "Snapshots a finished Game that was not watched by replaying its moves."
+        from pacman import GameState
+        state = GameState()
+        state.initialize(game.state.data.layout, len(game.state.data.agentStates) - 1)
+        snapshots = []
+        for i, (agentIndex, action) in enumerate(game.moveHistory):
+            if i > 0 and i % self.snapshotInterval == 0:
+                snapshots.append((i, encodeSnapshot(state)))
+            state = state.generateSuccessor(agentIndex, action)
+        return snapshots
+
+    def writeGame(self, game):
+        "Appends a finished Game."
+        gameLayout = game.state.data.layout
+        key = getLayoutKey(gameLayout)
+        if key not in self.layoutKeys:
+            self.writeRecord(b'L', key + '\n'.join(gameLayout.layoutText).encode())
+            self.layoutKeys.add(key)
+
+        numAgents = len(game.state.data.agentStates)
+        if game in self.watched:
+            # a snapshot of the final state would never be used
+            snapshots = [(i, data) for i, data in self.watched.pop(game) if i < len(game.moveHistory)]
+        else:
+            snapshots = self.replaySnapshots(game)
+
+        parts = [GAME.pack(key, numAgents, game.state.getScore(), game.state.isWin(),
+                           len(game.moveHistory), len(snapshots)),
+                 encodeMoves(game.moveHistory)]
+        for i, data in snapshots:
+            parts.append(SNAPSHOT.pack(i, len(data)))
+            parts.append(data)
+        self.writeRecord(b'G', b''.join(parts))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class GameLogReader:
+    """
+    Reads a log a record at a time. Iterating over it yields its games in
+    order; getGame finds a game by its index, remembering where the games
+    it passed start so they can be read again without scanning.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise Exception(path + ' is not a game log')
+        self.layouts = {}
+        self.gameOffsets = []
+        # where the scan for the next game offset carries on
+        self.scanOffset = len(MAGIC)
+
+    def readRecord(self):
+        "Returns the tag, offset and payload of the next record, or None at the end."
+        offset = self.file.tell()
+        header = self.file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return None
+        tag, length = RECORD.unpack(header)
+        return tag, offset, self.file.read(length)
+
+    def readLayout(self, payload):
+        key = payload[:8]
+        if key not in self.layouts:
+            self.layouts[key] = layout.Layout(payload[8:].decode().split('\n'))
+        return key
+
+    def readLayouts(self):
+        "Yields the key of each layout in the log."
+        self.file.seek(len(MAGIC))
+        while True:
+            record = self.readRecord()
+            if record is None:
+                return
+            if record[0] == b'L':
+                yield self.readLayout(record[2])
+
+    def parseGame(self, payload):
+        key, numAgents, score, win, numMoves, numSnapshots = GAME.unpack_from(payload)
+        offset = GAME.size
+        moveData = payload[offset:offset + numMoves]
+        offset += numMoves
+        snapshots = []
+        for i in range(numSnapshots):
+            moveIndex, length = SNAPSHOT.unpack_from(payload, offset)
+            offset += SNAPSHOT.size
+            snapshots.append((moveIndex, payload[offset:offset + length]))
+            offset += length
+        return GameRecord(self.layouts[key], numAgents, score, win, moveData, snapshots)
+
+    def scanTo(self, index):
+        "Reads on until the offset of game index is known, or the log ends."
+        self.file.seek(self.scanOffset)
+        while len(self.gameOffsets) <= index:
+            record = self.readRecord()
+            if record is None:
+                break
+            tag, offset, payload = record
+            if tag == b'L':
+                self.readLayout(payload)
+            elif tag == b'G':
+                self.gameOffsets.append(offset)
+        self.scanOffset = self.file.tell()
+
+    def getGame(self, index):
+        if index >= len(self.gameOffsets):
+            self.scanTo(index)
+        if index >= len(self.gameOffsets):
+            raise Exception('The log has only %d games' % len(self.gameOffsets))
+        self.file.seek(self.gameOffsets[index])
+        return self.parseGame(self.readRecord()[2])
+
+    def __iter__(self):
+        self.file.seek(len(MAGIC))
+        index = 0
+        while True:
+            record = self.readRecord()
+            if record is None:
+                return
+            tag, offset, payload = record
+            if tag == b'L':
+                self.readLayout(payload)
+            elif tag == b'G':
+                if index == len(self.gameOffsets):
+                    self.gameOffsets.append(offset)
+                    self.scanOffset = self.file.tell()
+                index += 1
+                position = self.file.tell()
+                yield self.parseGame(payload)
+                # the caller may have used getGame in between
+                self.file.seek(position)
+
+    def close(self):
+        self.file.close()
@@ -178,6 +178,8 @@ class GradingAgent(Agent):
         # keep track of elapsed moves
         self.stepCount = 0
         self.seed = seed
+        # count the states the student agent generates at each move
+        GameState.setExploredTracking('states')
 
     def registerInitialState(self, state):
         if 'registerInitialState' in dir(self.studentAgent):
@@ -261,6 +263,7 @@ class PolyAgent(Agent):
         self.partialPlyBugLists = []
         self.seed = seed
         self.stepCount = 0
+        GameState.setExploredTracking('states')
 
     def select(self, list, indices):
         """
@@ -0,0 +1,146 @@
+# test_gameLog.py
+# ---------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks that games written to a game log read back the same.
+
+  > python -m unittest test_gameLog
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import gameLog
+import ghostAgents
+import layout
+import pacman
+import pacmanAgents
+import textDisplay
+
+
+def playGames(layoutName, numGames, seed, writer=None):
+    "Plays games, letting writer watch them if one is given."
+    random.seed(seed)
+    gameLayout = layout.getLayout(layoutName)
+    ghosts = [ghostAgents.RandomGhost(i + 1) for i in range(gameLayout.getNumGhosts())]
+    rules = pacman.ClassicGameRules()
+    games = []
+    for i in range(numGames):
+        game = rules.newGame(gameLayout, pacmanAgents.GreedyAgent(), ghosts, textDisplay.NullGraphics(), True)
+        if writer is not None:
+            writer.watchGame(game)
+        game.run()
+        games.append(game)
+    return games
+
+
+def replayStates(record):
+    "Every state of a recorded game, by replaying all of its moves."
+    state = pacman.GameState()
+    state.initialize(record.layout, record.numAgents - 1)
+    states = [state]
+    for agentIndex, action in record.getActions():
+        state = state.generateSuccessor(agentIndex, action)
+        states.append(state)
+    return states
+
+
+class GameLogTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.log')
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def writeGames(self, games, snapshotInterval):
+        writer = gameLog.GameLogWriter(self.path, snapshotInterval)
+        for game in games:
+            writer.writeGame(game)
+        writer.close()
+
+    def testRoundTrip(self):
+        games = playGames('smallClassic', 3, 1) + playGames('capsuleClassic', 2, 2)
+        self.writeGames(games[:3], 10)
+        # appending reuses the layout already in the log
+        self.writeGames(games[3:], 10)
+
+        reader = gameLog.GameLogReader(self.path)
+        records = list(reader)
+        self.assertEqual(len(records), len(games))
+        self.assertEqual(len(set(key for key in reader.readLayouts())), 2)
+        for game, record in zip(games, records):
+            self.assertEqual(record.getActions(), game.moveHistory)
+            self.assertEqual(record.score, game.state.getScore())
+            self.assertEqual(record.win, game.state.isWin())
+            self.assertEqual(len(record.snapshots), (len(game.moveHistory) - 1) // 10)
+
+            for moveIndex, state in enumerate(replayStates(record)):
+                restored = record.getState(moveIndex)
+                self.assertEqual(restored, state)
+                self.assertEqual(hash(restored), hash(state))
+                self.assertEqual(str(restored), str(state))
+            final = record.getState(record.getNumMoves())
+            self.assertEqual(final.isWin(), game.state.isWin())
+            self.assertEqual(final.isLose(), game.state.isLose())
+
+        self.assertEqual(reader.getGame(4).getActions(), games[4].moveHistory)
+        self.assertEqual(reader.getGame(0).getActions(), games[0].moveHistory)
+        reader.close()
+
+    def testWatchedGames(self):
+        # snapshots taken while the games are played match a replay of them
+        writer = gameLog.GameLogWriter(self.path, 10)
+        games = playGames('smallClassic', 2, 4, writer) + playGames('capsuleClassic', 2, 5, writer)
+        for game in games:
+            watched = [(i, data) for i, data in writer.watched[game] if i < len(game.moveHistory)]
+            self.assertEqual(watched, writer.replaySnapshots(game))
+            writer.writeGame(game)
+        self.assertEqual(writer.watched, {})
+        writer.close()
+
+        reader = gameLog.GameLogReader(self.path)
+        for game, record in zip(games, reader):
+            self.assertEqual(record.getActions(), game.moveHistory)
+            self.assertEqual(record.getState(record.getNumMoves()), game.state)
+        reader.close()
+
+    def testSnapshotRoundTrip(self):
+        games = playGames('capsuleClassic', 2, 3)
+        for game in games:
+            numAgents = len(game.state.data.agentStates)
+            state = pacman.GameState()
+            state.initialize(game.state.data.layout, numAgents - 1)
+            for agentIndex, action in game.moveHistory:
+                state = state.generateSuccessor(agentIndex, action)
+                snapshot = gameLog.decodeSnapshot(gameLog.encodeSnapshot(state), numAgents)
+                restored = gameLog.restoreSnapshot(state.data.layout, numAgents, snapshot)
+                self.assertEqual(restored, state)
+                self.assertEqual(restored.isWin(), state.isWin())
+                self.assertEqual(restored.isLose(), state.isLose())
+                self.assertEqual(restored.getPacmanPosition(), state.getPacmanPosition())
+
+    def testNotALog(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a game log')
+        self.assertRaises(Exception, gameLog.GameLogReader, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
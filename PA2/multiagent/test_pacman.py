@@ -0,0 +1,129 @@
+# test_pacman.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks of GameState successors, which share what they do not change with
+their predecessor, against successors of fully copied states, and of the
+incrementally updated Zobrist hashes against hashes worked out in full.
+
+  > python -m unittest test_pacman
+"""
+
+import random
+import unittest
+
+import layout
+import pacman
+from game import getZobristKeys
+
+LAYOUTS = ['testClassic', 'smallClassic', 'capsuleClassic', 'mediumClassic', 'trappedClassic']
+
+# capsules and ghosts close to Pacman, so random games eat capsules and scared ghosts
+CROWDED = layout.Layout(['%%%%%%%%',
+                         '%o.PoG.%',
+                         '%.%%%%.%',
+                         '%G.o..o%',
+                         '%%%%%%%%'])
+
+
+def contents(state):
+    "Everything about a state that a game can change, in plain values."
+    data = state.data
+    agents = tuple((agentState.configuration.pos, agentState.configuration.direction, agentState.scaredTimer)
+                   for agentState in data.agentStates)
+    return (tuple(tuple(column) for column in data.food.data), tuple(sorted(data.capsules)), agents,
+            data.score, state.isWin(), state.isLose())
+
+
+def playouts(numGames, seed):
+    "Yields the states of random games on each layout, each game a list of states."
+    generator = random.Random(seed)
+    for gameLayout in [layout.getLayout(name) for name in LAYOUTS] + [CROWDED]:
+        for game in range(numGames):
+            state = pacman.GameState()
+            state.initialize(gameLayout, gameLayout.getNumGhosts())
+            states = [state]
+            agentIndex = 0
+            while not state.isWin() and not state.isLose() and len(states) < 300:
+                action = generator.choice(state.getLegalActions(agentIndex))
+                state = state.generateSuccessor(agentIndex, action)
+                states.append(state)
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+            yield states
+
+
+class CopyOnWriteTest(unittest.TestCase):
+
+    def testPredecessorsAreUnchanged(self):
+        generator = random.Random(1)
+        for states in playouts(4, 0):
+            before = [contents(state) for state in states]
+            for i, state in enumerate(states[:-1]):
+                if state.isWin() or state.isLose():
+                    continue
+                # every other successor too, made from a state and from a full copy of it
+                for agentIndex in range(state.getNumAgents()):
+                    for action in state.getLegalActions(agentIndex):
+                        successor = state.generateSuccessor(agentIndex, action)
+                        expected = state.deepCopy().generateSuccessor(agentIndex, action)
+                        self.assertEqual(contents(successor), contents(expected))
+                        # and its successors in turn
+                        if not successor.isWin() and not successor.isLose():
+                            nextIndex = (agentIndex + 1) % state.getNumAgents()
+                            nextAction = generator.choice(successor.getLegalActions(nextIndex))
+                            successor.generateSuccessor(nextIndex, nextAction)
+            self.assertEqual([contents(state) for state in states], before)
+
+
+def fullHashes(state):
+    "The food and capsule hashes of a state, worked out from all of its dots and capsules."
+    food = state.data.food
+    foodKeys, capsuleKeys = getZobristKeys(food.width, food.height)
+    foodHash = capsuleHash = 0
+    for x, y in food.asList():
+        foodHash ^= foodKeys[x * food.height + y]
+    for x, y in state.data.capsules:
+        capsuleHash ^= capsuleKeys[x * food.height + y]
+    return foodHash, capsuleHash
+
+
+class ZobristHashTest(unittest.TestCase):
+
+    def testAgainstFullHashes(self):
+        for states in playouts(4, 2):
+            # the states of a game, and every successor of each of them
+            allStates = list(states)
+            for state in states:
+                if not state.isWin() and not state.isLose():
+                    for agentIndex in range(state.getNumAgents()):
+                        for action in state.getLegalActions(agentIndex):
+                            allStates.append(state.generateSuccessor(agentIndex, action))
+            byContents = {}
+            for state in allStates:
+                self.assertEqual((state.data._foodHash, state.data._capsuleHash), fullHashes(state))
+                self.assertEqual(state.deepCopy(), state)
+                self.assertEqual(hash(state.deepCopy()), hash(state))
+                byContents.setdefault(contents(state)[:4], []).append(state)
+            # states are equal exactly when their contents are
+            groups = list(byContents.values())
+            for i, group in enumerate(groups):
+                for state in group[1:]:
+                    self.assertEqual(state, group[0])
+                    self.assertEqual(hash(state), hash(group[0]))
+                for other in groups[i + 1:i + 20]:
+                    self.assertNotEqual(group[0], other[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,7 @@
 from util import *
 import time
 import os
+import random
 import traceback
 import sys
 
@@ -231,6 +232,17 @@ class Grid:
         g.data = self.data
         return g
 
+    def copyColumn(self, x):
+        """
+        Returns a copy that shares every column with this grid except
+        column x, which can then be changed on its own.
+        """
+        g = Grid(0, 0)
+        g.width, g.height = self.width, self.height
+        g.data = self.data[:]
+        g.data[x] = self.data[x][:]
+        return g
+
     def count(self, item=True):
         return sum([x.count(item) for x in self.data])
 
@@ -393,6 +405,26 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+ZOBRIST_KEYS = {}
+
+
+def getZobristKeys(width, height):
+    """
+    Returns a table of random 64 bit keys for the food and one for the
+    capsules of a width by height layout, with the key of (x, y) at
+    x * height + y. The food hash of a state is the xor of the keys of its
+    dots, so eating a dot updates it with a single xor.
+    """
+    if (width, height) not in ZOBRIST_KEYS:
+        # a generator of its own, so the keys are the same in every run and
+        # the games' random choices are not disturbed
+        generator = random.Random(0)
+        foodKeys = [generator.getrandbits(64) for i in range(width * height)]
+        capsuleKeys = [generator.getrandbits(64) for i in range(width * height)]
+        ZOBRIST_KEYS[(width, height)] = (foodKeys, capsuleKeys)
+    return ZOBRIST_KEYS[(width, height)]
+
+
 class GameStateData:
 
     def __init__(self, prevState=None):
@@ -400,9 +432,13 @@ class GameStateData:
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            # The food, the capsules and the agent states are shared with the
+            # predecessor; the rules copy each one before changing it
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
+            self._foodHash = prevState._foodHash
+            self._capsuleHash = prevState._capsuleHash
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
@@ -418,6 +454,8 @@ class GameStateData:
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -431,6 +469,29 @@ class GameStateData:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def copyAgentState(self, index):
+        """
+        Replaces the agent state at index with a copy of its own, which can
+        be changed without changing the states that shared it.
+        """
+        agentState = self.agentStates[index].copy()
+        self.agentStates[index] = agentState
+        return agentState
+
+    def removeFood(self, x, y):
+        "Eats the dot at (x, y), updating the food hash."
+        self.food = self.food.copyColumn(x)
+        self.food[x][y] = False
+        foodKeys, capsuleKeys = getZobristKeys(self.food.width, self.food.height)
+        self._foodHash ^= foodKeys[x * self.food.height + y]
+
+    def removeCapsule(self, position):
+        "Eats the capsule at position, updating the capsule hash."
+        self.capsules = [c for c in self.capsules if c != position]
+        x, y = position
+        foodKeys, capsuleKeys = getZobristKeys(self.food.width, self.food.height)
+        self._capsuleHash ^= capsuleKeys[x * self.food.height + y]
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -440,6 +501,8 @@ class GameStateData:
         # TODO Check for type of other
         if not self.agentStates == other.agentStates:
             return False
+        if self._foodHash != other._foodHash or self._capsuleHash != other._capsuleHash:
+            return False
         if not self.food == other.food:
             return False
         if not self.capsules == other.capsules:
@@ -450,15 +513,11 @@ class GameStateData:
 
     def __hash__(self):
         """
-        Allows states to be keys of dictionaries.
+        Allows states to be keys of dictionaries. The food and the capsules
+        are hashed by the keys kept up to date as they are eaten, so only the
+        few agent states are hashed here.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        return hash((self._foodHash, self._capsuleHash, tuple(self.agentStates), self.score))
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -522,6 +581,13 @@ class GameStateData:
         self.food = layout.food.copy()
         #self.capsules = []
         self.capsules = layout.capsules[:]
+        foodKeys, capsuleKeys = getZobristKeys(layout.width, layout.height)
+        self._foodHash = 0
+        for x, y in self.food.asList():
+            self._foodHash ^= foodKeys[x * layout.height + y]
+        self._capsuleHash = 0
+        for x, y in self.capsules:
+            self._capsuleHash ^= capsuleKeys[x * layout.height + y]
         self.layout = layout
         self.score = 0
         self.scoreChange = 0
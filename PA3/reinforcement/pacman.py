@@ -77,15 +77,35 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # Instrumentation of generateSuccessor, off by default since it costs a
+    # hash of every state. With exploredTracking 'states' the states passed to
+    # and returned by generateSuccessor are kept in explored (the autograder
+    # counts them); with 'count' only the number of successors generated is
+    # kept in exploredCount, which needs no memory however long the run is.
+    exploredTracking = None
     explored = set()
+    exploredCount = 0
+
+    def setExploredTracking(mode):
+        if mode not in (None, 'states', 'count'):
+            raise Exception('Unknown explored tracking: ' + str(mode))
+        GameState.exploredTracking = mode
+        GameState.getAndResetExplored()
+        GameState.getAndResetExploredCount()
+    setExploredTracking = staticmethod(setExploredTracking)
 
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
+        tmp = GameState.explored
         GameState.explored = set()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getAndResetExploredCount():
+        tmp = GameState.exploredCount
+        GameState.exploredCount = 0
+        return tmp
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -129,8 +149,11 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploredTracking == 'states':
+            GameState.explored.add(self)
+            GameState.explored.add(state)
+        elif GameState.exploredTracking == 'count':
+            GameState.exploredCount += 1
         return state
 
     def getLegalPacmanActions(self):
@@ -359,7 +382,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.copyAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -379,8 +402,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood(x, y)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -389,11 +411,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.removeCapsule(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.copyAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -425,7 +447,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.copyAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -460,6 +482,7 @@ class GhostRules:
     def collide(state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.copyAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person